@@ -0,0 +1,80 @@
+import os, sys, time, math, importlib.util
+import bmesh
+from mathutils import Matrix
+
+# times slicing a base mesh into a grid of sections, bisect_plane on the whole mesh per line as the first operator did
+# against bisect_grid of ops/utils.py, which only passes the faces on the line
+# needs bmesh, so it is run by Blender: blender --background --python benchmarks/bench_bisect_grid.py -- [faces per section side]
+
+OPS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ops")
+
+def load_module(name):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(OPS_PATH, name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+ut = load_module("utils")
+
+def get_base(number, size, num_faces):
+	
+	# a grid covering the sections, rotated so the cuts do not follow its edges
+	
+	bm = bmesh.new()
+	segments = number * num_faces
+	bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=number * size * 0.5)
+	bmesh.ops.rotate(bm, verts=bm.verts, cent=(0, 0, 0), matrix=Matrix.Rotation(math.radians(10), 3, "Z"))
+	return bm
+	
+def bisect_lines(bm, number, size):
+	
+	# the loops of the first operator
+	
+	for i in range(number + 1):
+		try:
+			l = bm.verts[:] + bm.edges[:] + bm.faces[:]
+			co = ((i - 0.5 * number) * size, 0, 0)
+			no = (1, 0, 0)
+			d = bmesh.ops.bisect_plane(bm, geom=l, plane_co=co, plane_no=no)
+			bmesh.ops.split_edges(bm, edges=[e for e in d["geom_cut"] if isinstance(e, bmesh.types.BMEdge)])
+		except RuntimeError:
+			continue
+			
+	for i in range(number + 1):
+		try:
+			l = bm.verts[:] + bm.edges[:] + bm.faces[:]
+			co = (0, (i - 0.5 * number) * size, 0)
+			no = (0, 1, 0)
+			d = bmesh.ops.bisect_plane(bm, geom=l, plane_co=co, plane_no=no)
+			bmesh.ops.split_edges(bm, edges=[e for e in d["geom_cut"] if isinstance(e, bmesh.types.BMEdge)])
+		except RuntimeError:
+			continue
+			
+def main():
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	num_faces = int(argv[0]) if argv else 4
+	size = 10.0
+	
+	print("{:>8} {:>10} {:>10} {:>10} {:>8}".format("grid", "faces", "planes", "grid", "speedup"))
+	for number in (8, 32, 64):
+		bm = get_base(number, size, num_faces)
+		num_base = len(bm.faces)
+		start = time.perf_counter()
+		bisect_lines(bm, number, size)
+		lines = time.perf_counter() - start
+		num_lines = len(bm.faces)
+		bm.free()
+		
+		bm = get_base(number, size, num_faces)
+		start = time.perf_counter()
+		ut.bisect_grid(bm, (number, number), (size, size))
+		grid = time.perf_counter() - start
+		num_grid = len(bm.faces)
+		bm.free()
+		
+		if num_lines != num_grid:
+			print("Warning:", number, "faces differ,", num_lines, "against", num_grid)
+		print("{:>8} {:>10} {:>10.3f} {:>10.3f} {:>7.1f}x".format(str(number) + "x" + str(number), num_base, lines, grid, lines / grid))
+		
+if __name__ == "__main__":
+	main()
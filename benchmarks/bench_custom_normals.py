@@ -0,0 +1,93 @@
+import types, numpy
+import stubs
+
+# times reading the custom normals of a quad grid, the per polygon loop of the first add-on
+# against the vectorized get_custom_normals of ops/utils.py
+# usage: python benchmarks/bench_custom_normals.py
+
+ut = stubs.load_module("utils")
+
+class Collection(list):
+	
+	# mesh data collection, foreach_get copies a numpy array of the attribute into the sequence
+	
+	def __init__(self, items, arrays):
+		list.__init__(self, items)
+		self.arrays = arrays
+		
+	def foreach_get(self, attr, seq):
+		seq[:] = self.arrays[attr].ravel().tolist() if isinstance(seq, list) else self.arrays[attr].ravel()
+		
+def get_grid_object(n, seed=0):
+	rng = numpy.random.RandomState(seed)
+	x, y = numpy.meshgrid(numpy.arange(n + 1), numpy.arange(n + 1))
+	co = numpy.stack((x.ravel(), y.ravel(), rng.uniform(0.0, 0.2, x.size)), axis=1).astype(numpy.float32)
+	v = numpy.arange((n + 1) ** 2).reshape(n + 1, n + 1)
+	loop_vert = numpy.stack((v[:-1, :-1], v[:-1, 1:], v[1:, 1:], v[1:, :-1]), axis=2).ravel().astype(numpy.int32)
+	num_loops = len(loop_vert)
+	normals = rng.uniform(-1.0, 1.0, (num_loops, 3)).astype(numpy.float32)
+	loop_start = numpy.arange(0, num_loops, 4, dtype=numpy.int32)
+	loop_total = numpy.full(len(loop_start), 4, dtype=numpy.int32)
+	select = numpy.ones(len(co), dtype=numpy.bool_)
+	
+	vertices = [types.SimpleNamespace(co=stubs.Vector(c), select=True) for c in co.tolist()]
+	loops = [types.SimpleNamespace(index=i, vertex_index=vi) for i, vi in enumerate(loop_vert.tolist())]
+	polygons = [types.SimpleNamespace(loop_indices=range(s, s + 4)) for s in loop_start.tolist()]
+	
+	mesh = types.SimpleNamespace(calc_normals_split=lambda: None)
+	mesh.vertices = Collection(vertices, {"co": co, "select": select})
+	mesh.loops = Collection(loops, {"normal": normals, "vertex_index": loop_vert})
+	mesh.polygons = Collection(polygons, {"loop_start": loop_start, "loop_total": loop_total})
+	return types.SimpleNamespace(data=mesh)
+	
+def get_custom_normals_loop(ob, approx_ndigits=-1, from_selected=False):
+	
+	# the implementation of the first add-on
+	
+	def triform(loop_indices):
+		indices = list(loop_indices)
+		if len(indices) < 4:
+			return indices
+		return [indices[i] for i in (0, 1, 2, 2, 3, 0)]
+		
+	mesh = ob.data
+	mesh.calc_normals_split()
+	
+	clnors = [0.0] * 3 * len(mesh.loops)
+	mesh.loops.foreach_get("normal", clnors)
+	loop_vert = {l.index: l.vertex_index for l in mesh.loops}
+	
+	normals = {}
+	
+	for poly in mesh.polygons:
+		
+		for li in triform(poly.loop_indices):
+			vert = mesh.vertices[loop_vert[li]]
+			
+			if from_selected and not vert.select:
+				continue
+				
+			vert_normal = [clnors[li*3], clnors[li*3+1], clnors[li*3+2]]
+			if approx_ndigits != -1:
+				vert_normal = [round(f, approx_ndigits) for f in vert_normal]
+				
+			id = str([round(f) for f in vert.co.xy])
+			normals[id] = vert_normal
+			
+	return normals
+	
+def main():
+	print("{:>8} {:>10} {:>10} {:>10} {:>8}".format("grid", "loops", "loop", "numpy", "speedup"))
+	for n in (32, 64, 128, 256):
+		ob = get_grid_object(n)
+		for approx_ndigits, from_selected in ((-1, False), (3, True)):
+			a = get_custom_normals_loop(ob, approx_ndigits, from_selected)
+			b = ut.get_custom_normals(ob, approx_ndigits, from_selected)
+			if list(a.items()) != list(b.items()):
+				raise ValueError("results differ")
+		loop = stubs.timeit(lambda: get_custom_normals_loop(ob))
+		vectorized = stubs.timeit(lambda: ut.get_custom_normals(ob))
+		print("{:>8} {:>10} {:>10.3f} {:>10.3f} {:>7.1f}x".format(str(n) + "x" + str(n), len(ob.data.loops), loop, vectorized, loop / vectorized))
+		
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,38 @@
+import os, sys, time, importlib.util, numpy
+
+# times the quadric error decimator of ops/decimate.py on bumpy grids, headless
+# usage: python benchmarks/bench_decimate.py [ratio]
+
+OPS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ops")
+
+def load_module(name):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(OPS_PATH, name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+dc = load_module("decimate")
+
+def get_grid(n, seed=0):
+	rng = numpy.random.RandomState(seed)
+	x, y = numpy.meshgrid(numpy.arange(n + 1, dtype=numpy.float64), numpy.arange(n + 1, dtype=numpy.float64))
+	co = numpy.stack((x.ravel(), y.ravel(), rng.uniform(0.0, 0.2, x.size)), axis=1)
+	v = numpy.arange((n + 1) ** 2).reshape(n + 1, n + 1)
+	a, b, c, d = v[:-1, :-1].ravel(), v[:-1, 1:].ravel(), v[1:, 1:].ravel(), v[1:, :-1].ravel()
+	tris = numpy.concatenate((numpy.stack((a, b, c), axis=1), numpy.stack((a, c, d), axis=1)))
+	boundary = (co[:, 0] == 0) | (co[:, 0] == n) | (co[:, 1] == 0) | (co[:, 1] == n)
+	return co, tris, boundary
+	
+def main():
+	ratio = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+	
+	print("{:>8} {:>10} {:>10} {:>10} {:>12}".format("grid", "triangles", "remaining", "seconds", "triangles/s"))
+	for n in (16, 32, 64, 128):
+		co, tris, boundary = get_grid(n)
+		start = time.perf_counter()
+		verts, tris_out, corners = dc.decimate(co, tris, ratio, boundary)
+		seconds = time.perf_counter() - start
+		print("{:>8} {:>10} {:>10} {:>10.3f} {:>12.0f}".format(str(n) + "x" + str(n), len(tris), len(tris_out), seconds, len(tris) / seconds))
+		
+if __name__ == "__main__":
+	main()
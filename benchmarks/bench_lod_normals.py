@@ -0,0 +1,104 @@
+import os, sys, pickle, tempfile, types
+import stubs
+
+# times copying the custom normals of a section map at game start, the pickled string keys of the first runtime
+# against the memory-mapped packed keys of gen/BGE_TOOLS_OT_lod_sections.py
+# usage: python benchmarks/bench_lod_normals.py [sections per side] [vertices per section side]
+
+lod = stubs.load_module("BGE_TOOLS_OT_lod_sections", stubs.GEN_PATH)
+
+def get_section_map(num_sections, num_verts):
+	
+	# returns the inactive objects and their normals, keyed per vertex by the rounded xy coordinates
+	
+	objects = []
+	normals_data = {}
+	for j in range(num_sections):
+		for i in range(num_sections):
+			name = "SECT_{}_{}".format(i, j)
+			x0 = (i - num_sections // 2) * (num_verts - 1)
+			y0 = (j - num_sections // 2) * (num_verts - 1)
+			verts = [stubs.Vertex((x0 + x, y0 + y, 0.0)) for y in range(num_verts) for x in range(num_verts)]
+			objects.append(stubs.GameObject(name, meshes=[stubs.Mesh(name, verts)]))
+			normals_data[name] = {str([x0 + x, y0 + y]): [0.0, 0.6, 0.8] for y in range(num_verts) for x in range(num_verts)}
+	return objects, normals_data
+	
+def save_normals(file_path, normals_data):
+	
+	# writes the data in the layout of ops/utils.py save_normals
+	
+	entries = []
+	arrays = []
+	offset = lod.NORMALS_HEADER.size + lod.NORMALS_ENTRY.size * len(normals_data)
+	for ob_name, ob_normals in normals_data.items():
+		keys = [lod.pack_key(*[int(f) for f in id.strip("[]").split(",")]) for id in ob_normals]
+		normals = [f for normal in ob_normals.values() for f in normal]
+		count = len(keys)
+		padding = -(count * 20) % 8
+		entries.append(lod.NORMALS_ENTRY.pack(ob_name.encode("utf-8"), offset, count, 0))
+		arrays.append(lod.struct.pack("<{}q{}f{}x".format(count, count * 3, padding), *(keys + normals)))
+		offset += count * 20 + padding
+		
+	with open(file_path, "wb") as f:
+		f.write(lod.NORMALS_HEADER.pack(lod.NORMALS_MAGIC, lod.NORMALS_VERSION, 0, len(normals_data)))
+		for data in entries + arrays:
+			f.write(data)
+			
+def copy_legacy(scene, file_path):
+	
+	# the loop of the first runtime
+	
+	with open(file_path, "rb") as f:
+		normals_data = pickle.load(f)
+		
+	for ob_name, ob_normals in normals_data.items():
+		ob = scene.objectsInactive[ob_name]
+		mesh = ob.meshes[0]
+		
+		for mat_id in range(mesh.numMaterials):
+			for vert_id in range(mesh.getVertexArrayLength(mat_id)):
+				vert = mesh.getVertex(mat_id, vert_id)
+				id = str([round(f) for f in vert.XYZ.xy])
+				if id in ob_normals:
+					vert.normal = ob_normals[id]
+					
+def copy_packed(scene, file_path):
+	
+	# the jobs of the current runtime, without a budget
+	
+	own = types.SimpleNamespace(scene=scene, normals_data=lod.CustomNormals(file_path))
+	for ob_name in own.normals_data:
+		job = lod.LODSections.custom_normals_job(own, ob_name)
+		next(job)
+		try:
+			while True:
+				job.send(float("inf"))
+		except StopIteration:
+			pass
+			
+def main():
+	num_sections = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+	num_verts = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+	
+	objects, normals_data = get_section_map(num_sections, num_verts)
+	scene = stubs.Scene(objects)
+	
+	with tempfile.TemporaryDirectory() as dir_path:
+		legacy_path = os.path.join(dir_path, "legacy.txt")
+		with open(legacy_path, "wb") as f:
+			pickle.dump(normals_data, f)
+		packed_path = os.path.join(dir_path, "packed" + lod.NORMALS_EXT)
+		save_normals(packed_path, normals_data)
+		
+		legacy = stubs.timeit(lambda: copy_legacy(scene, legacy_path))
+		packed = stubs.timeit(lambda: copy_packed(scene, packed_path))
+		
+	num_total = num_sections * num_sections * num_verts * num_verts
+	print("{}x{} sections, {} vertices".format(num_sections, num_sections, num_total))
+	print("{:>8} {:>10} {:>12}".format("keys", "seconds", "vertices/s"))
+	print("{:>8} {:>10.3f} {:>12.0f}".format("string", legacy, num_total / legacy))
+	print("{:>8} {:>10.3f} {:>12.0f}".format("packed", packed, num_total / packed))
+	print("speedup {:.2f}x".format(legacy / packed))
+	
+if __name__ == "__main__":
+	main()
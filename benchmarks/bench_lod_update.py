@@ -0,0 +1,100 @@
+import sys, collections
+import stubs
+
+# times the runtime update of a section map while a block of sections at lod level 1 moves over it,
+# the list based update of the first runtime against the set based update of gen/BGE_TOOLS_OT_lod_sections.py
+# only the update without a grid is timed, the first runtime had none
+# usage: python benchmarks/bench_lod_update.py [sections per side] [active sections per side] [tics]
+
+lod = stubs.load_module("BGE_TOOLS_OT_lod_sections", stubs.GEN_PATH)
+
+LEGACY_PHYSICS_SUFFIX = "_PHYSICS"
+
+class LegacyLODSections:
+	
+	# the update of the first runtime
+	
+	def __init__(self, scene, sections):
+		self.scene = scene
+		self.sections = list(sections.values())
+		self.active_sections = []
+		self.localTransform = stubs.Matrix.Identity(4)
+		
+	def update(self):
+		active_sections = [sect.name for sect in self.sections if sect.currentLodLevel == 1]
+		for sect in list(self.active_sections):
+			if sect not in active_sections:
+				self.active_sections.remove(sect)
+				self.scene.objects[sect + LEGACY_PHYSICS_SUFFIX].endObject()
+		for sect in active_sections:
+			if sect not in self.active_sections:
+				self.active_sections.append(sect)
+				inst = self.scene.addObject(sect + LEGACY_PHYSICS_SUFFIX)
+				inst.localTransform = self.localTransform * inst.localTransform
+				
+def get_lod_sections(scene, sections):
+	
+	# the current runtime, with the attributes set by its constructor for a map without normals, grid or streaming
+	
+	own = lod.LODSections.__new__(lod.LODSections)
+	stubs.GameObject.__init__(own, "LOD_SECTIONS", scene)
+	own.sections = sections
+	own.stream_distance = 0.0
+	own.grid = None
+	own.physics_names = {name: name + lod.PHYSICS_SUFFIX for name in sections}
+	own.physics = {}
+	own.active_sections = set()
+	own.physics_pool_size = 0
+	own.physics_hysteresis = 0
+	own.physics_leaving = {}
+	own.physics_parked = collections.OrderedDict()
+	own.physics_transforms = {}
+	own.normals_pending = collections.OrderedDict()
+	own.normals_job = None
+	return own
+	
+def get_scene(num_sections):
+	names = ["SECT_{}_{}".format(i, j) for j in range(num_sections) for i in range(num_sections)]
+	objects = []
+	for name in names:
+		for suffix in ("", lod.PHYSICS_SUFFIX, LEGACY_PHYSICS_SUFFIX):
+			objects.append(stubs.GameObject(name + suffix))
+	scene = stubs.Scene(objects)
+	sections = collections.OrderedDict((name, scene.addObject(name)) for name in names)
+	return scene, sections
+	
+def run(own, sections, num_sections, num_active, num_tics):
+	
+	# the block of sections at lod level 1 moves one section along a diagonal every tic
+	
+	grid = list(sections.values())
+	active = []
+	for tic in range(num_tics):
+		for sect in active:
+			sect.currentLodLevel = 2
+		start = tic % (num_sections - num_active)
+		active = [grid[j * num_sections + i] for j in range(start, start + num_active) for i in range(start, start + num_active)]
+		for sect in active:
+			sect.currentLodLevel = 1
+		own.update()
+		
+def main():
+	num_sections = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+	num_active = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+	num_tics = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+	
+	results = []
+	for get_own in (LegacyLODSections, get_lod_sections):
+		scene, sections = get_scene(num_sections)
+		own = get_own(scene, sections)
+		seconds = stubs.timeit(lambda: run(own, sections, num_sections, num_active, num_tics), 1)
+		results.append((seconds, len(scene.objects)))
+		
+	print("{}x{} sections, {}x{} at lod level 1, {} tics".format(num_sections, num_sections, num_active, num_active, num_tics))
+	print("{:>8} {:>10} {:>12} {:>10}".format("update", "seconds", "ms/tic", "objects"))
+	for label, (seconds, num_objects) in zip(("list", "set"), results):
+		print("{:>8} {:>10.3f} {:>12.3f} {:>10}".format(label, seconds, seconds * 1000.0 / num_tics, num_objects))
+	print("speedup {:.1f}x".format(results[0][0] / results[1][0]))
+	
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,114 @@
+import os, sys, time, math, numpy, resource, subprocess, importlib.util
+import bpy, bmesh
+
+# measures the rise of peak memory while slicing a base mesh into a grid of sections, the whole base at once
+# against streaming bands of rows built from the arrays of the base, as ops/lod_generator.py does
+# peak memory only rises within a process, so every run is made by a Blender process of its own
+# needs bpy, so it is run by Blender: blender --background --python benchmarks/bench_streaming.py -- [faces per section side] [rows per band]
+
+OPS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ops")
+NUMBER = 32
+SIZE = 10.0
+
+def load_module(name):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(OPS_PATH, name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+ut = load_module("utils")
+
+def get_peak_memory():
+	
+	# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+	
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == "darwin" else peak * 1024
+	
+def get_base(num_faces):
+	
+	# a grid of quads covering the sections with a uv map and vertex colors, rotated so the cuts do not follow its edges
+	# it is made from arrays, so no bmesh of the whole grid raises the peak before the slicing is measured
+	
+	segments = NUMBER * num_faces
+	x, y = numpy.meshgrid(numpy.linspace(-0.5, 0.5, segments + 1), numpy.linspace(-0.5, 0.5, segments + 1))
+	angle = math.radians(10)
+	co = numpy.stack((x.ravel() * math.cos(angle) - y.ravel() * math.sin(angle), x.ravel() * math.sin(angle) + y.ravel() * math.cos(angle), numpy.zeros(x.size)), axis=1) * NUMBER * SIZE
+	
+	v = numpy.arange((segments + 1) ** 2).reshape(segments + 1, segments + 1)
+	loop_vert = numpy.stack((v[:-1, :-1], v[:-1, 1:], v[1:, 1:], v[1:, :-1]), axis=2).ravel().astype(numpy.int32)
+	num_polys = segments ** 2
+	
+	me = bpy.data.meshes.new("BASE")
+	ut.set_mesh_arrays(me, {
+		"co": co,
+		"edge_verts": numpy.zeros((0, 2), dtype=numpy.int32),
+		"edge_sharp": numpy.zeros(0, dtype=numpy.bool_),
+		"edge_seam": numpy.zeros(0, dtype=numpy.bool_),
+		"edge_crease": numpy.zeros(0, dtype=numpy.float32),
+		"edge_bevel_weight": numpy.zeros(0, dtype=numpy.float32),
+		"loop_vert": loop_vert,
+		"loop_start": numpy.arange(0, num_polys * 4, 4, dtype=numpy.int32),
+		"loop_total": numpy.full(num_polys, 4, dtype=numpy.int32),
+		"material_index": numpy.zeros(num_polys, dtype=numpy.int32),
+		"use_smooth": numpy.zeros(num_polys, dtype=numpy.bool_),
+		"uv_names": numpy.array(["UVMap"], dtype=numpy.str_),
+		"uvs": co[None, loop_vert, :2] / (NUMBER * SIZE),
+		"color_names": numpy.array(["Col"], dtype=numpy.str_),
+		"colors": numpy.ones((1, len(loop_vert), 3), dtype=numpy.float32)
+	})
+	return me
+	
+def slice_whole(me, num_rows):
+	bm = bmesh.new()
+	bm.from_mesh(me)
+	ut.bisect_grid(bm, (NUMBER, NUMBER), (SIZE, SIZE))
+	bm.free()
+	
+def slice_bands(me, num_rows):
+	arrays = ut.get_mesh_arrays(me)
+	loop_y = arrays["co"][arrays["loop_vert"], 1]
+	poly_min_y = numpy.minimum.reduceat(loop_y, arrays["loop_start"])
+	poly_max_y = numpy.maximum.reduceat(loop_y, arrays["loop_start"])
+	del loop_y
+	
+	bottom = -0.5 * NUMBER * SIZE
+	for j0 in range(0, NUMBER, num_rows):
+		j1 = min(j0 + num_rows, NUMBER)
+		y0 = bottom + j0 * SIZE if j0 else -math.inf
+		y1 = bottom + j1 * SIZE if j1 < NUMBER else math.inf
+		mask = (poly_max_y >= y0 - 0.0001) & (poly_min_y <= y1 + 0.0001)
+		
+		band_me = bpy.data.meshes.new("BAND")
+		ut.set_mesh_arrays(band_me, ut.get_polygons_arrays(arrays, mask))
+		bm = bmesh.new()
+		bm.from_mesh(band_me)
+		ut.remove(band_me)
+		ut.bisect_grid(bm, (NUMBER, NUMBER), (SIZE, SIZE))
+		bm.free()
+		
+def run(mode, num_faces, num_rows):
+	me = get_base(num_faces)
+	start_peak = get_peak_memory()
+	start = time.perf_counter()
+	(slice_whole if mode == "whole" else slice_bands)(me, num_rows)
+	print("RESULT", len(me.polygons), time.perf_counter() - start, get_peak_memory() - start_peak)
+	
+def main():
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	num_faces = int(argv[0]) if argv else 16
+	num_rows = int(argv[1]) if len(argv) > 1 else 4
+	
+	if len(argv) > 2:
+		run(argv[2], num_faces, num_rows)
+		return
+		
+	print("{:>8} {:>10} {:>10} {:>12}".format("slicing", "faces", "seconds", "peak rise MB"))
+	for mode in ("whole", "bands"):
+		args = [bpy.app.binary_path, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--", str(num_faces), str(num_rows), mode]
+		output = subprocess.check_output(args, universal_newlines=True)
+		num_polys, seconds, peak_rise = next(line.split()[1:] for line in output.splitlines() if line.startswith("RESULT"))
+		print("{:>8} {:>10} {:>10.3f} {:>12.1f}".format(mode, num_polys, float(seconds), int(peak_rise) / 1024 ** 2))
+		
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,108 @@
+import sys
+import stubs
+
+# times playing uv scroll sequences, the offsets computed every pulse by the first script
+# against the frame tables of gen/bge_tools_uv_scroll.py
+# mathutils is stubbed in Python, so building a matrix costs more than in Blender and the speedup is an upper bound
+# usage: python benchmarks/bench_uv_scroll.py [objects] [pulses]
+
+uv = stubs.load_module("bge_tools_uv_scroll", stubs.GEN_PATH)
+Vector = stubs.Vector
+Matrix = stubs.Matrix
+
+SEQUENCES = (
+	("4, 4", "0-15", -1, False),
+	("8, 8", "0-63", -1, True),
+	("4, 4", "0-3, 5*4, 15-8", 3, True),
+)
+
+class LegacyUVScroll:
+	
+	# the state and main of the first script, for a valid sequence
+	
+	def __init__(self, own):
+		sprites = [int(i) for i in own["sprites"].split(", ")]
+		sprite_size = Vector([1 / sprites[i] for i in range(2)]).to_3d()
+		self.sprite_coords = [Vector([x * sprite_size[0], y * sprite_size[1]]).to_3d() for y in range(sprites[1]) for x in range(sprites[0])]
+		
+		# the ids are recovered from the compiled coordinates, the sequences are valid
+		
+		num_x = sprites[0]
+		self.sequence = [round(x * num_x + y * num_x * sprites[1]) for x, y, z in uv.get_sequence(own["sprites"], own["sequence"])]
+		self.loop = own["loop"]
+		self.pingpong = own["pingpong"]
+		self.mesh = own.meshes[0]
+		self.mat_id = 0
+		self.always = None
+		self.num_sequence = len(self.sequence)
+		self.extremes = [0, self.num_sequence - 1]
+		self.direction = 1
+		self.end = False
+		self.id = 0
+		self.offset = Matrix.Translation(self.sprite_coords[self.sequence[self.id]])
+		
+	def main(self):
+		
+		def get_offset(self, next_id):
+			if not self.sequence:
+				return Matrix.Identity(4)
+			current_coords = self.sprite_coords[self.sequence[self.id]]
+			next_coords = self.sprite_coords[self.sequence[next_id]]
+			return Matrix.Translation(next_coords - current_coords)
+			
+		def get_next_id(self):
+			next_id = self.id + self.direction
+			if next_id in self.extremes:
+				if self.loop:
+					if self.loop > 0:
+						self.loop -= 1
+					if self.pingpong:
+						self.direction *= -1
+				else:
+					self.end = True
+			elif next_id == self.num_sequence:
+				next_id = 0
+			return next_id
+			
+		self.mesh.transformUV(self.mat_id, self.offset, 0)
+		
+		if self.end:
+			return
+			
+		next_id = get_next_id(self)
+		self.offset = get_offset(self, next_id)
+		self.id = next_id
+		
+def get_objects(num_objects):
+	scene = stubs.Scene()
+	objects = []
+	for i in range(num_objects):
+		sprites, sequence, loop, pingpong = SEQUENCES[i % len(SEQUENCES)]
+		name = "SPRITE_" + str(i)
+		own = stubs.GameObject(name, scene, [stubs.Mesh("ME" + name, [])], sprites=sprites, sequence=sequence, loop=loop, pingpong=pingpong, linked=False)
+		scene.objectsInactive[name] = own
+		objects.append(own)
+	return objects
+	
+def run(uv_scrolls, num_pulses):
+	for i in range(num_pulses):
+		for uv_scroll in uv_scrolls:
+			uv_scroll.main()
+			
+def main():
+	num_objects = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	num_pulses = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	
+	objects = get_objects(num_objects)
+	legacy = stubs.timeit(lambda: run([LegacyUVScroll(own) for own in objects], num_pulses))
+	table = stubs.timeit(lambda: run([uv.UVScroll(own) for own in objects], num_pulses))
+	
+	num_updates = num_objects * num_pulses
+	print("{} objects, {} pulses".format(num_objects, num_pulses))
+	print("{:>8} {:>10} {:>12}".format("offsets", "seconds", "updates/s"))
+	print("{:>8} {:>10.3f} {:>12.0f}".format("pulse", legacy, num_updates / legacy))
+	print("{:>8} {:>10.3f} {:>12.0f}".format("table", table, num_updates / table))
+	print("speedup {:.1f}x".format(legacy / table))
+	
+if __name__ == "__main__":
+	main()
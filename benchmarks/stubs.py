@@ -0,0 +1,211 @@
+import os, sys, time, types, math, collections, importlib.util
+
+# minimal stand-ins for the bge, mathutils, bpy and bmesh modules, so the game scripts and operator helpers can be timed headless
+# they are pure Python, so absolute timings are not those of the game engine, only the ratios between two paths are of interest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEN_PATH = os.path.join(ROOT_PATH, "gen")
+OPS_PATH = os.path.join(ROOT_PATH, "ops")
+
+class Vector(tuple):
+	
+	def __new__(cls, seq=(0.0, 0.0, 0.0)):
+		return tuple.__new__(cls, seq)
+		
+	x = property(lambda self: self[0])
+	y = property(lambda self: self[1])
+	z = property(lambda self: self[2])
+	xy = property(lambda self: Vector(self[:2]))
+	length = property(lambda self: math.sqrt(sum(f * f for f in self)))
+	
+	def __add__(self, other):
+		return Vector(a + b for a, b in zip(self, other))
+		
+	def __sub__(self, other):
+		return Vector(a - b for a, b in zip(self, other))
+		
+	def to_3d(self):
+		return Vector((tuple(self) + (0.0, 0.0, 0.0))[:3])
+		
+	def copy(self):
+		return Vector(self)
+		
+class Matrix(tuple):
+	
+	def __new__(cls, rows):
+		return tuple.__new__(cls, (tuple(row) for row in rows))
+		
+	@classmethod
+	def Identity(cls, size):
+		return cls([[float(i == j) for j in range(size)] for i in range(size)])
+		
+	@classmethod
+	def Translation(cls, vector):
+		rows = [list(row) for row in cls.Identity(4)]
+		for i, f in enumerate(vector):
+			rows[i][3] = f
+		return cls(rows)
+		
+	def __mul__(self, other):
+		return self
+		
+	def copy(self):
+		return Matrix(self)
+		
+class Stub(types.ModuleType):
+	
+	# any attribute is another stub, calling one returns a stub as well
+	
+	def __getattr__(self, name):
+		if name.startswith("__"):
+			raise AttributeError(name)
+		return Stub(self.__name__ + "." + name)
+		
+	def __call__(self, *args, **kwargs):
+		return Stub(self.__name__ + "()")
+		
+class Vertex:
+	
+	__slots__ = ("XYZ", "normal")
+	
+	def __init__(self, co):
+		self.XYZ = Vector(co)
+		self.normal = (0.0, 0.0, 1.0)
+		
+class Mesh:
+	
+	def __init__(self, name, verts, num_materials=1):
+		self.name = name
+		self.numMaterials = num_materials
+		self.verts = verts
+		
+	def getVertexArrayLength(self, mat_id):
+		return len(self.verts)
+		
+	def getVertex(self, mat_id, vert_id):
+		return self.verts[vert_id]
+		
+	def getMaterialName(self, mat_id):
+		return "MA" + self.name + "_UV"
+		
+	def transformUV(self, mat_id, matrix, uv_index):
+		pass
+		
+class GameObject(dict):
+	
+	# game objects compare by identity and are true without properties, their properties are the items
+	
+	__eq__ = object.__eq__
+	__ne__ = object.__ne__
+	__hash__ = object.__hash__
+	__bool__ = lambda self: True
+	
+	def __init__(self, name, scene=None, meshes=(), **props):
+		dict.__init__(self, props)
+		self.name = name
+		self.scene = scene
+		self.meshes = list(meshes)
+		self.invalid = False
+		self.visible = True
+		self.currentLodLevel = 0
+		self.localTransform = Matrix.Identity(4)
+		self.worldTransform = Matrix.Identity(4)
+		self.worldPosition = Vector()
+		
+	def replaceMesh(self, mesh):
+		self.meshes[0] = mesh
+		
+	def endObject(self):
+		self.invalid = True
+		if self.scene:
+			self.scene.objects.remove(self)
+			
+	def setParent(self, parent, compound=True, ghost=True):
+		pass
+		
+class ObjectList:
+	
+	# like the object lists of the game engine, an object is looked up by name by going through the list
+	# objects are kept in insertion order, removing one does not go through the list
+	
+	def __init__(self):
+		self.objects = collections.OrderedDict()
+		
+	def __iter__(self):
+		return iter(self.objects.values())
+		
+	def __len__(self):
+		return len(self.objects)
+		
+	def __contains__(self, key):
+		return any(ob.name == key for ob in self) if isinstance(key, str) else id(key) in self.objects
+		
+	def __getitem__(self, key):
+		if isinstance(key, str):
+			for ob in self:
+				if ob.name == key:
+					return ob
+			raise KeyError(key)
+		if key in (-1, len(self.objects) - 1):
+			return next(reversed(self.objects.values()))
+		return list(self)[key]
+		
+	def append(self, ob):
+		self.objects[id(ob)] = ob
+		
+	def remove(self, ob):
+		del self.objects[id(ob)]
+		
+class Scene:
+	
+	def __init__(self, objects_inactive=()):
+		self.objectsInactive = {ob.name: ob for ob in objects_inactive}
+		self.objects = ObjectList()
+		self.active_camera = None
+		
+	def addObject(self, name, *args):
+		base = self.objectsInactive[name]
+		ob = GameObject(name, self, base.meshes, **base)
+		self.objects.append(ob)
+		return ob
+		
+def install():
+	
+	# the stubs are only installed where the real modules are missing
+	
+	mathutils = types.ModuleType("mathutils")
+	mathutils.Vector = Vector
+	mathutils.Matrix = Matrix
+	sys.modules.setdefault("mathutils", mathutils)
+	
+	bge = types.ModuleType("bge")
+	bge.types = types.ModuleType("bge.types")
+	bge.types.KX_GameObject = GameObject
+	bge.logic = types.ModuleType("bge.logic")
+	bge.logic.getRealTime = time.perf_counter
+	bge.logic.expandPath = lambda path: os.path.join(ROOT_PATH, path.lstrip("/"))
+	bge.logic.LibNew = lambda name, type, names: [Mesh(name, [])]
+	bge.logic.LibFree = lambda name: None
+	sys.modules.setdefault("bge", bge)
+	
+	for name in ("bpy", "bmesh"):
+		sys.modules.setdefault(name, Stub(name))
+		
+def load_module(name, dir_path=OPS_PATH):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(dir_path, name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+def timeit(func, repeat=3):
+	
+	# returns the best time of repeat calls
+	
+	best = float("inf")
+	for i in range(repeat):
+		start = time.perf_counter()
+		func()
+		best = min(best, time.perf_counter() - start)
+	return best
+	
+install()
@@ -1,20 +1,149 @@
-import bge, os, pickle
+import bge, os, time, math, pickle, mmap, struct, json
+from collections import OrderedDict
 
 PROP_NAME = "BGE_TOOLS_LOD_SECTIONS"
-PHYSICS_SUFFIX = "_PHYSICS"
+PHYSICS_SUFFIX = "_PHYS"
 LOD_SUFFIX = "_LOD"
+BUDGET_SUFFIX = "_BUDGET"
+POOL_SUFFIX = "_POOL"
+HYSTERESIS_SUFFIX = "_HYSTERESIS"
+PARK_POSITION = (0.0, 0.0, -1.0e6)
+STREAM_DISTANCE_SUFFIX = "_STREAM_DISTANCE"
+STREAM_OBJECTS_SUFFIX = "_STREAM_OBJECTS"
+STREAM_TIME_SUFFIX = "_STREAM_TIME"
+STREAM_UNLOAD_FACTOR = 1.25
+STREAM_REFRESH_FACTOR = 0.1
+GRID_SUFFIX = "_GRID"
+GRID_EXT = ".json"
+GRID_MARGIN_FACTOR = 1.25
 
-class LODSections(bge.types.KX_GameObject):
+NORMALS_EXT = ".bin"
+NORMALS_MAGIC = b"BGTN"
+NORMALS_VERSION = 2
+NORMALS_HEADER = struct.Struct("<4sHHQ")
+NORMALS_ENTRY = struct.Struct("<64sQII")
+
+def pack_key(x, y):
+	return (round(x) << 32) | (round(y) & 0xFFFFFFFF)
+	
+class CustomNormals:
 	
-	sections = []
-	active_sections = []
+	# memory-mapped custom normals file
+	# only the section table is parsed up front, the keys and normals of an object are read on request
+	
+	def __init__(self, file_path):
+		self.file = open(file_path, "rb")
+		self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.view = memoryview(self.map)
+		
+		magic, version, reserved, num_entries = NORMALS_HEADER.unpack_from(self.map, 0)
+		if magic != NORMALS_MAGIC or version != NORMALS_VERSION:
+			raise ValueError(file_path, "unsupported custom normals file")
+			
+		self.entries = []
+		self.table = {}
+		for i in range(num_entries):
+			name, offset, count, reserved = NORMALS_ENTRY.unpack_from(self.map, NORMALS_HEADER.size + NORMALS_ENTRY.size * i)
+			name = name.rstrip(b"\0").decode("utf-8")
+			self.entries.append(name)
+			self.table[name] = (offset, count)
+			
+	def __iter__(self):
+		return iter(self.entries)
+		
+	def __contains__(self, name):
+		return name in self.table
+		
+	def get(self, name):
+		offset, count = self.table[name]
+		keys_end = offset + count * 8
+		keys = self.view[offset:keys_end].cast("q")
+		normals = self.view[keys_end:keys_end + count * 3 * 4].cast("f")
+		return keys, normals
+		
+class LegacyCustomNormals:
+	
+	# pickled custom normals file, kept for files that have not been converted yet
+	
+	def __init__(self, file_path):
+		with open(file_path, "rb") as f:
+			self.data = pickle.load(f)
+			
+	def __iter__(self):
+		return iter(self.data)
+		
+	def __contains__(self, name):
+		return name in self.data
+		
+	def get(self, name):
+		keys = []
+		normals = []
+		for id, normal in self.data[name].items():
+			keys.append(pack_key(*json.loads(id)))
+			normals += normal
+		return keys, normals
+
+class LODSections(bge.types.KX_GameObject):
 	
 	def __init__(self, own):
 		self.visible = False
-		normals_data = self.copy_custom_normals()
-		self.sections = self.add_sections(normals_data)
+		normals_data = self.load_custom_normals()
+		
+		objects_inactive = self.scene.objectsInactive
+		self.section_names = [ob_name for ob_name in normals_data if LOD_SUFFIX not in ob_name]
+		self.section_set = set(self.section_names)
+		self.sections = {}
+		
+		# with the grid exported by the operator only the sections in the cells around the camera are checked
+		
+		self.grid = self.load_grid()
+		self.grid_cell = None
+		self.grid_names = []
+		if self.grid:
+			self.grid_inverse = self.localTransform.inverted()
+			scale = self.localTransform.to_scale()
+			self.grid_scale = min(abs(scale.x), abs(scale.y)) or 1.0
+		
+		# the normals are queued before any section is added, added sections are moved to the front of the queue
+		
+		self.copy_custom_normals(normals_data)
+		
+		# sections are added in order of distance to the active camera within the stream distance, if there is one
+		# a limited number of sections is added or removed per tic
+		
+		self.stream_distance = self.get(PROP_NAME + STREAM_DISTANCE_SUFFIX, 0.0)
+		self.stream_objects = self.get(PROP_NAME + STREAM_OBJECTS_SUFFIX, 0)
+		self.stream_time = self.get(PROP_NAME + STREAM_TIME_SUFFIX, 0.0) * 0.001
+		self.stream_origin = None
+		self.stream_queue = []
 		
-	def copy_custom_normals(self):
+		if self.stream_distance > 0:
+			self.section_positions = {}
+			for name in self.section_names:
+				self.section_positions[name] = (self.localTransform * objects_inactive[name].worldTransform).translation
+		else:
+			for name in self.section_names:
+				self.add_section(name)
+				
+		# names of the sections at lod level 1 and their physics objects, physics names are looked up once
+		
+		self.physics_names = {}
+		for name in self.section_names:
+			physics_name = name + PHYSICS_SUFFIX
+			if physics_name in objects_inactive:
+				self.physics_names[name] = physics_name
+		self.physics = {}
+		self.active_sections = set()
+		
+		# physics objects of sections that left lod level 1 are kept for a number of tics, then parked out of reach up to the pool size
+		
+		self.physics_pool_size = self.get(PROP_NAME + POOL_SUFFIX, 0)
+		self.physics_hysteresis = self.get(PROP_NAME + HYSTERESIS_SUFFIX, 0)
+		self.physics_leaving = {}
+		self.physics_parked = OrderedDict()
+		self.physics_transforms = {}
+		
+	def load_custom_normals(self):
 		if not (PROP_NAME in self and self[PROP_NAME]):
 			return
 			
@@ -22,46 +151,236 @@ class LODSections(bge.types.KX_GameObject):
 		if not os.path.exists(dir_path):
 			print("Warning:", dir_path, "does not exist.")
 			
+		file_path = os.path.join(dir_path, self.name + NORMALS_EXT)
+		if os.path.exists(file_path):
+			return CustomNormals(file_path)
+			
 		file_path = os.path.join(dir_path, self.name + ".txt")
-		with open(file_path, "rb") as f:
-			normals_data = pickle.load(f)
+		print("Warning:", file_path, "uses the legacy format, regenerate or convert it.")
+		return LegacyCustomNormals(file_path)
+		
+	def load_grid(self):
+		file_path = bge.logic.expandPath("//" + PROP_NAME)
+		file_path = os.path.join(file_path, self.name + GRID_SUFFIX + GRID_EXT)
+		if not os.path.exists(file_path):
+			return None
 			
-		for ob_name, ob_normals in normals_data.items():
-			ob = self.scene.objectsInactive[ob_name]
-			mesh = ob.meshes[0]
+		with open(file_path) as f:
+			return json.load(f)
 			
-			for mat_id in range(mesh.numMaterials):
-				for vert_id in range(mesh.getVertexArrayLength(mat_id)):
-					vert = mesh.getVertex(mat_id, vert_id)
-					id = str([round(f) for f in vert.XYZ.xy])
-					if id in ob_normals:
-						vert.normal = ob_normals[id]
-						
-		return normals_data
-		
-	def add_sections(self, normals_data):
-		sections = []
+	def get_grid_cell(self, position):
+		local = self.grid_inverse * position
+		num_x, num_y = self.grid["number"]
+		size_x, size_y = self.grid["size"]
+		i = min(max(int(math.floor(local.x / size_x + num_x * 0.5)), 0), num_x - 1)
+		j = min(max(int(math.floor(local.y / size_y + num_y * 0.5)), 0), num_y - 1)
+		return i, j
+		
+	def get_grid_names(self, cell, distance):
+		
+		# returns the names of the sections whose centers may lie within distance of any point of cell
+		
+		i, j = cell
+		num_x, num_y = self.grid["number"]
+		size_x, size_y = self.grid["size"]
+		distance /= self.grid_scale
+		range_x = int(math.ceil(distance / size_x)) + 1
+		range_y = int(math.ceil(distance / size_y)) + 1
+		
+		base_name = self.grid["base_name"]
+		ids = self.grid["ids"]
+		names = []
+		for y in range(max(j - range_y, 0), min(j + range_y, num_y - 1) + 1):
+			for x in range(max(i - range_x, 0), min(i + range_x, num_x - 1) + 1):
+				name = base_name + ids[y * num_x + x]
+				if name in self.section_set:
+					names.append(name)
+		return names
+		
+	def copy_custom_normals(self, normals_data):
+		
+		# queue the section objects and their lod objects per section
+		# without a budget all normals are copied at once, otherwise a number of vertices is copied every tick
+		
+		self.normals_data = normals_data
+		self.normals_budget = self.get(PROP_NAME + BUDGET_SUFFIX, 0)
+		self.normals_pending = OrderedDict()
+		self.normals_job = None
+		
 		for ob_name in normals_data:
-			if LOD_SUFFIX in ob_name:
+			i = ob_name.rfind(LOD_SUFFIX)
+			sect_name = ob_name[:i] if i != -1 else ob_name
+			self.normals_pending.setdefault(sect_name, []).append(ob_name)
+			
+		if self.normals_budget <= 0:
+			self.update_custom_normals(float("inf"))
+			
+	def prioritize_custom_normals(self, sect_name):
+		if sect_name in self.normals_pending:
+			self.normals_pending.move_to_end(sect_name, False)
+			
+	def update_custom_normals(self, budget):
+		while budget > 0:
+			if self.normals_job is None:
+				if not self.normals_pending:
+					return
+				sect_name, ob_names = next(iter(self.normals_pending.items()))
+				self.normals_job = self.custom_normals_job(ob_names.pop(0))
+				if not ob_names:
+					del self.normals_pending[sect_name]
+				next(self.normals_job)
+			try:
+				budget -= self.normals_job.send(budget)
+			except StopIteration:
+				self.normals_job = None
+				
+	def custom_normals_job(self, ob_name):
+		
+		# copies the normals of one object, pausing whenever the received budget is spent
+		
+		ob = self.scene.objectsInactive[ob_name]
+		mesh = ob.meshes[0]
+		
+		keys, normals = self.normals_data.get(ob_name)
+		index = dict(zip(keys, range(0, len(keys) * 3, 3)))
+		get_index = index.get
+		get_vertex = mesh.getVertex
+		
+		budget = yield 0
+		
+		for mat_id in range(mesh.numMaterials):
+			num_verts = mesh.getVertexArrayLength(mat_id)
+			start = 0
+			while start < num_verts:
+				end = min(num_verts, start + budget)
+				for vert_id in range(start, end):
+					vert = get_vertex(mat_id, vert_id)
+					x, y = vert.XYZ.xy
+					i = get_index((round(x) << 32) | (round(y) & 0xFFFFFFFF))
+					if i is not None:
+						vert.normal = normals[i:i + 3]
+				budget = yield end - start
+				start = end
+				
+	def add_section(self, name):
+		inst = self.scene.addObject(name)
+		inst.setParent(self, False, False)
+		inst.localTransform = self.localTransform * inst.localTransform
+		self.sections[name] = inst
+		self.prioritize_custom_normals(name)
+		
+	def remove_section(self, name):
+		self.sections.pop(name).endObject()
+		
+	def get_stream_queue(self, position):
+		
+		# returns the sections to be removed followed by those to be added, farthest first, so the list can be popped
+		
+		load_distance = self.stream_distance
+		unload_distance = load_distance * STREAM_UNLOAD_FACTOR
+		add = []
+		remove = []
+		
+		if self.grid:
+			names = self.get_grid_names(self.get_grid_cell(position), load_distance)
+			for name in self.sections:
+				if (self.section_positions[name] - position).length > unload_distance:
+					remove.append(name)
+		else:
+			names = self.section_names
+			
+		for name in names:
+			if name in self.sections:
+				if not self.grid and (self.section_positions[name] - position).length > unload_distance:
+					remove.append(name)
 				continue
-			inst = self.scene.addObject(ob_name)
-			inst.setParent(self, False, False)
-			inst.localTransform = self.localTransform * inst.localTransform
-			sections.append(inst)
+			distance = (self.section_positions[name] - position).length
+			if distance <= load_distance:
+				add.append((distance, name))
+		add.sort(reverse=True)
+		return [(False, name) for distance, name in add] + [(True, name) for name in remove]
+		
+	def update_streaming(self):
+		camera = self.scene.active_camera
+		if not camera:
+			return
 			
-		return sections
+		position = camera.worldPosition
+		if self.stream_origin is None or (position - self.stream_origin).length > self.stream_distance * STREAM_REFRESH_FACTOR:
+			self.stream_origin = position.copy()
+			self.stream_queue = self.get_stream_queue(position)
+			
+		start = time.perf_counter()
+		count = 0
+		while self.stream_queue:
+			if self.stream_objects > 0 and count >= self.stream_objects:
+				break
+			if self.stream_time > 0 and count and time.perf_counter() - start >= self.stream_time:
+				break
+			remove, name = self.stream_queue.pop()
+			if remove and name in self.sections:
+				self.remove_section(name)
+				count += 1
+			elif not remove and name not in self.sections:
+				self.add_section(name)
+				count += 1
+				
+	def add_physics(self, name):
+		inst = self.physics_parked.pop(name, None)
+		if inst:
+			inst.worldTransform = self.physics_transforms[name]
+		else:
+			physics_name = self.physics_names.get(name)
+			if not physics_name:
+				return
+			inst = self.scene.addObject(physics_name)
+			inst.localTransform = self.localTransform * inst.localTransform
+			self.physics_transforms[name] = inst.worldTransform.copy()
+		self.physics[name] = inst
 		
+	def remove_physics(self, name):
+		inst = self.physics.pop(name, None)
+		if not inst:
+			return
+		if self.physics_pool_size <= 0:
+			inst.endObject()
+			return
+		inst.worldPosition = PARK_POSITION
+		self.physics_parked[name] = inst
+		if len(self.physics_parked) > self.physics_pool_size:
+			name, inst = self.physics_parked.popitem(False)
+			inst.endObject()
+			
 	def update(self):
-		active_sections = [sect.name for sect in self.sections if sect.currentLodLevel == 1]
-		for sect in list(self.active_sections):
-			if sect not in active_sections:
-				self.active_sections.remove(sect)
-				self.scene.objects[sect + PHYSICS_SUFFIX].endObject()
-		for sect in active_sections:
-			if sect not in self.active_sections:
-				self.active_sections.append(sect)
-				inst = self.scene.addObject(sect + PHYSICS_SUFFIX)
-				inst.localTransform = self.localTransform * inst.localTransform
+		if self.stream_distance > 0:
+			self.update_streaming()
+		camera = self.scene.active_camera
+		if self.grid and camera:
+			cell = self.get_grid_cell(camera.worldPosition)
+			if cell != self.grid_cell:
+				self.grid_cell = cell
+				self.grid_names = self.get_grid_names(cell, self.grid["lod_distance"] * GRID_MARGIN_FACTOR)
+			sections = self.sections
+			active_sections = {name for name in self.grid_names if name in sections and sections[name].currentLodLevel == 1}
+		else:
+			active_sections = {name for name, sect in self.sections.items() if sect.currentLodLevel == 1}
+		if active_sections != self.active_sections:
+			for name in self.active_sections - active_sections:
+				self.physics_leaving[name] = self.physics_hysteresis
+			for name in active_sections - self.active_sections:
+				self.prioritize_custom_normals(name)
+				if self.physics_leaving.pop(name, None) is None:
+					self.add_physics(name)
+			self.active_sections = active_sections
+		if self.physics_leaving:
+			for name, tics in list(self.physics_leaving.items()):
+				if tics > 0:
+					self.physics_leaving[name] = tics - 1
+				else:
+					del self.physics_leaving[name]
+					self.remove_physics(name)
+		if self.normals_pending or self.normals_job:
+			self.update_custom_normals(self.normals_budget)
 				
 def get_mutated(cls, cont):
 	obj = cont.owner
@@ -3,15 +3,140 @@
 from bge import logic
 from mathutils import Vector, Matrix
 
+PROP_NAME_MANAGER = "manager"
+PROP_NAME_SKIP = "skip"
+PROP_NAME_POOL = "pool"
+PROP_NAME_PHASES = "phases"
+PROP_NAME_FRAME_RATE = "frame_rate"
+PROP_NAME_CULL = "cull"
+PROP_NAME_CULL_DISTANCE = "cull_distance"
+
+# time based playback follows the game time, so it stops while the game is paused and follows the time scale
+# runtimes without the frame time fall back to the real time
+
+get_time = getattr(logic, "getFrameTime", logic.getRealTime)
+
+# compiled sequences, keyed by the properties "sprites" and "sequence"
+# frame tables, keyed by the properties "sprites", "sequence", "loop" and "pingpong"
+
+sequences = {}
+frame_tables = {}
+
+def get_sequence(sprites, string):
+	
+	# return the coordinates of the sprites of the sequence as a tuple, compiled once per sprite sheet and sequence
+	# the sequence is validated by the operator, values it would reject are skipped
+	
+	key = (sprites, string)
+	if key in sequences:
+		return sequences[key]
+		
+	num_x, num_y = [int(i) for i in sprites.split(",")]
+	num_sprites = num_x * num_y
+	
+	def get_ids(s, sep):
+		ids = [int(i) if i.isdigit() else -1 for i in s.split(sep)]
+		if len(ids) != 2 or not all(0 <= id < num_sprites for id in ids):
+			return None
+		return ids
+		
+	ids = []
+	for s in [s for s in string.replace(" ", "").split(",") if s != ""]:
+		if "-" in s:
+			ds = get_ids(s, "-")
+			if ds:
+				first, last = ds
+				dir = -1 if first > last else 1
+				ids.extend(range(first, last + dir, dir))
+		elif "*" in s:
+			ds = get_ids(s, "*")
+			if ds:
+				id, num = ds
+				ids.extend([id] * num)
+		elif s.isdigit() and int(s) < num_sprites:
+			ids.append(int(s))
+			
+	sequence = sequences[key] = tuple((id % num_x / num_x, id // num_x / num_y, 0.0) for id in ids)
+	return sequence
+	
+def get_frame_table(sprites, string, loop, pingpong):
+	
+	# step through the sequence as it is played and store the offset applied at every frame
+	# offsets are shared between frames with the same translation
+	# the coordinates of the sprite shown after every frame are stored as well, to jump between any two frames
+	# an endless loop is stored once, the index of the frame it restarts from is returned with the frames, -1 if it ends
+	# tables are compiled once per key and shared by all objects using them
+	
+	key = (sprites, string, loop, pingpong)
+	if key in frame_tables:
+		return frame_tables[key]
+		
+	sequence = [Vector(coords) for coords in get_sequence(sprites, string)]
+	offsets = {}
+	
+	def get_offset(coords):
+		key = tuple(coords)
+		if key not in offsets:
+			offsets[key] = Matrix.Translation(coords)
+		return offsets[key]
+		
+	def get_frames():
+		frames = []
+		positions = []
+		if not sequence:
+			return frames, positions, -1
+			
+		num_sequence = len(sequence)
+		extremes = [0, num_sequence - 1]
+		loops = loop
+		direction = 1
+		end = False
+		id = 0
+		previous_id = None
+		offset = get_offset(sequence[id])
+		states = {}
+		
+		while True:
+			state = (id, previous_id, direction, loops, end)
+			if state in states:
+				return frames, positions, states[state]
+			states[state] = len(frames)
+			
+			frames.append(offset)
+			positions.append(tuple(sequence[id]))
+			
+			if end:
+				return frames, positions, -1
+				
+			next_id = id + direction
+			if next_id in extremes:
+				if loops:
+					if loops > 0:
+						loops -= 1
+					if pingpong:
+						direction *= -1
+				else:
+					end = True
+			elif next_id == num_sequence:
+				next_id = 0
+				
+			offset = get_offset(sequence[next_id] - sequence[id])
+			previous_id = id
+			id = next_id
+			
+	frames, positions, frame_loop = get_frames()
+	frame_table = frame_tables[key] = (tuple(frames), tuple(positions), frame_loop)
+	return frame_table
+	
 class UVScroll:
 	
-	def __init__(self, cont):
+	def __init__(self, own, always=None, pool_key=None):
 		
 		# get references to the owner, mesh and material id
-		# get sprite size and Vector coordinates from string property "sprites"
-		# convert string property "sequence" to an array of valid id's
-		# get data from string properties "spin", "loop" and "pingpong"
-		# initialize direction, id and offset
+		# get the frame table of the properties "sprites", "sequence", "loop" and "pingpong"
+		# with the property "frame_rate" the frame is computed from the time since the start, otherwise it advances every pulse
+		# with a pool key the mesh is shared by the objects added to the pool group
+		# with the properties "cull" and "cull_distance" the uv coordinates are not updated while no user is in view
 		
 		PROP_NAME_SPRITES = "sprites"
 		PROP_NAME_SEQUENCE = "sequence"
@@ -19,9 +144,6 @@ class UVScroll:
 		PROP_NAME_PINGPONG = "pingpong"
 		PROP_NAME_LINKED = "linked"
 		
-		ERR_MSG_ILLEGAL_VALUE = "UV Scroll Sequence contains illegal value:\t"
-		ERR_MSG_OUT_OF_RANGE = "UV Scroll Sequence is out of range:\t"
-		
 		def get_mesh(self):
 			mesh = self.own.meshes[0]
 			try:
@@ -32,7 +154,8 @@ class UVScroll:
 			if not hasattr(logic, "libnews"):
 				logic.libnews = 0
 			mesh_name = mesh.name
-			new_mesh = logic.LibNew(mesh_name + str(logic.libnews), "Mesh", [mesh_name])[0]
+			self.lib_name = mesh_name + str(logic.libnews)
+			new_mesh = logic.LibNew(self.lib_name, "Mesh", [mesh_name])[0]
 			self.own.replaceMesh(new_mesh)
 			logic.libnews += 1
 			return new_mesh
@@ -48,138 +171,283 @@ class UVScroll:
 					return mat_id
 			return -1
 			
-		def get_sprite_data(self):
-			sprites = [int(i) for i in self.own[PROP_NAME_SPRITES].split(", ")]
-			sprite_size = Vector([1 / sprites[i] for i in range(2)]).to_3d()
-			sprite_coords = []
-			for y in range(sprites[1]):
-				for x in range(sprites[0]):
-					sprite_coords.append(Vector([x * sprite_size[0], y * sprite_size[1]]).to_3d())
-			return sprite_coords, sprite_size
-			
-		def get_sequence(string):
-			
-			def digit_in_range(s, len):
-				if not s.isdigit():
-					return "ValueError"
-				d = int(s)
-				if not d < len:
-					return "IndexError"
-				return d
-				
-			def digits_in_range(l, len):
-				return [digit_in_range(s, len) for s in l]
-				
-			sequence = []
-			num_sprites = len(self.sprite_coords)
-			for s in [s for s in string.replace(" ", "").split(",") if s != ""]:
-				if "-" in s:
-					ds = digits_in_range(s.split("-"), num_sprites)
-					if "ValueError" in ds:
-						self.errors.append(ERR_MSG_ILLEGAL_VALUE + s)
-					elif "IndexError" in ds:
-						self.errors.append(ERR_MSG_OUT_OF_RANGE + s)
-					else:
-						first, last = ds
-						dir = -1 if first > last else 1
-						for i in range(first, last + dir, dir):
-							sequence.append(i)
-				elif "*" in s:
-					ds = digits_in_range(s.split("*"), num_sprites)
-					if "ValueError" in ds:
-						self.errors.append(ERR_MSG_ILLEGAL_VALUE + s)
-					elif "IndexError" in ds:
-						self.errors.append(ERR_MSG_OUT_OF_RANGE + s)
-					else:
-						id, num = ds
-						for i in range(num):
-							sequence.append(id)
-				else:
-					d = digit_in_range(s, num_sprites)
-					if d == "ValueError":
-						self.errors.append(ERR_MSG_ILLEGAL_VALUE + s)
-					elif d == "IndexError":
-						self.errors.append(ERR_MSG_OUT_OF_RANGE + s)
-					else:
-						sequence.append(d)
-						
-			return sequence
-			
-		def get_properties(self):
-			sequence = get_sequence(self.own[PROP_NAME_SEQUENCE])
-			loop = self.own[PROP_NAME_LOOP]
-			pingpong = self.own[PROP_NAME_PINGPONG]
-			return sequence, loop, pingpong
-		
-		self.own = cont.owner
-		self.errors = []
-		self.sprite_coords, self.sprite_size = get_sprite_data(self)
-		self.sequence, self.loop, self.pingpong = get_properties(self)
-		
-		if self.errors:
-			err_msg = "ERROR:\t" + self.own.name
-			for e in self.errors:
-				err_msg += "\n\t-> " + e
-			print(err_msg)
-			return
+		def get_radius(mesh):
+			
+			# get the radius of the sphere around the origin holding all vertices, for the frustum test
+			
+			radius = 0.0
+			for mat_id in range(mesh.numMaterials):
+				for i in range(mesh.getVertexArrayLength(mat_id)):
+					radius = max(radius, mesh.getVertex(mat_id, i).XYZ.length)
+			return radius
 			
+		self.own = own
+		self.users = [own]
+		self.pool_key = pool_key
+		self.lib_name = None
 		self.mesh = get_mesh(self)
 		self.mat_id = get_mat_id(self.mesh)
-		self.always = cont.sensors[0]
-		self.num_sequence = len(self.sequence)
-		self.extremes = [0, self.num_sequence - 1]
-		self.direction = 1
-		self.end = False
-		self.id = 0
-		self.offset = Matrix.Translation(self.sprite_coords[self.sequence[self.id]])
+		self.always = always
+		self.frames, self.positions, self.frame_loop = get_frame_table(own[PROP_NAME_SPRITES], own[PROP_NAME_SEQUENCE], own[PROP_NAME_LOOP], own[PROP_NAME_PINGPONG])
+		self.num_frames = len(self.frames)
+		self.frame = 0
+		self.frame_rate = own.get(PROP_NAME_FRAME_RATE, 0.0)
+		self.start_time = get_time()
+		self.position = (0.0, 0.0, 0.0)
+		self.pending = False
+		self.stopped = False
+		self.cull = own.get(PROP_NAME_CULL, False)
+		self.cull_distance = own.get(PROP_NAME_CULL_DISTANCE, 0.0)
+		self.radius = get_radius(self.mesh) if self.cull else 0.0
 		
-	def main(self):
+	def is_visible(self):
 		
-		# if there is no id this means the sequence has come to a stop, return
-		# scroll uv coordinates to offset
-		# get the next id
-		# calculate offset between current and next id
-		# update current id
-		
-		def get_offset(self, next_id):
-			if not self.sequence:
-				return Matrix.Identity(4)
-			current_coords = self.sprite_coords[self.sequence[self.id]]
-			next_coords = self.sprite_coords[self.sequence[next_id]]
-			return Matrix.Translation(next_coords - current_coords)
-
-		def get_next_id(self):
-			next_id = self.id + self.direction
-			if next_id in self.extremes:
-				if self.loop:
-					if self.loop > 0:
-						self.loop -= 1
-					if self.pingpong:
-						self.direction *= -1
-				else:
-					self.end = True
-			elif next_id == self.num_sequence:
-				next_id = 0
-			return next_id
+		# return whether a user is visible, closer to the active camera than the cull distance and, with cull, inside its frustum
+		# the scene is taken from the users, as the object that created the group may have ended, without a camera all are visible
 		
-		if self.errors:
-			return
+		if not self.cull and not self.cull_distance:
+			return True
+			
+		cam = None
+		for own in self.users:
+			if own.invalid:
+				continue
+			if cam is None:
+				cam = own.scene.active_camera
+				if cam is None:
+					return True
+			if not own.visible:
+				continue
+			if self.cull_distance and own.getDistanceTo(cam) > self.cull_distance:
+				continue
+			if self.cull and cam.sphereInsideFrustum(own.worldPosition, self.radius * max(abs(i) for i in own.worldScale)) == cam.OUTSIDE:
+				continue
+			return True
+		return False
+		
+	def set_position(self, position):
+		
+		# scroll uv coordinates from the shown sprite to the sprite at position in one step
+		
+		if position != self.position:
+			self.mesh.transformUV(self.mat_id, Matrix.Translation(Vector(position) - Vector(self.position)), 0)
+			self.position = position
 			
-		self.mesh.transformUV(self.mat_id, self.offset, 0)
+	def get_frame(self):
+		
+		# return the index of the frame to be shown at the current time, wrapped into the loop
+		
+		frame = int((get_time() - self.start_time) * self.frame_rate)
+		if frame < self.num_frames:
+			return frame
+		if self.frame_loop < 0:
+			return self.num_frames - 1
+		return self.frame_loop + (frame - self.frame_loop) % (self.num_frames - self.frame_loop)
+		
+	def stop(self):
 		
-		if self.end:
+		# the sequence has come to a stop, the sensors of the other users of a pool group are stopped by their controllers
+		
+		self.stopped = True
+		if self.always:
 			self.always.usePosPulseMode = False
+			
+	def main_time(self):
+		
+		# scroll uv coordinates from the shown sprite to the sprite of the current frame in one step
+		# frames passed since the last pulse are skipped, the sequence stops at the last frame if it ends
+		# while not visible the uv coordinates are left as they are, until shown again or at the end of the sequence
+		
+		frame = self.get_frame()
+		if self.is_visible():
+			self.set_position(self.positions[frame])
+			self.pending = False
+		else:
+			self.pending = True
+			
+		if self.frame_loop < 0 and frame == self.num_frames - 1:
+			self.frame = self.num_frames
+			if not self.pending:
+				self.stop()
+				
+	def main(self):
+		
+		# if there are no frames left the sequence has come to a stop, return
+		# if it stopped while not visible, show the last sprite once visible, keeping the sensor pulsing until then
+		# scroll uv coordinates by the offset of the current frame
+		# while not visible only count the frame, and jump to the sprite of the frame once visible again
+		# go to the next frame, or back to the start of the loop
+		# with a frame rate, go to the frame of the current time instead
+		
+		if self.frame == self.num_frames:
+			if self.pending and self.is_visible():
+				self.set_position(self.positions[-1])
+				self.pending = False
+				self.stop()
 			return
 			
-		next_id = get_next_id(self)
-		self.offset = get_offset(self, next_id)
-		self.id = next_id
+		if self.frame_rate:
+			self.main_time()
+			return
+			
+		if not self.is_visible():
+			self.pending = True
+		elif self.pending:
+			self.set_position(self.positions[self.frame])
+			self.pending = False
+		else:
+			self.mesh.transformUV(self.mat_id, self.frames[self.frame], 0)
+			self.position = self.positions[self.frame]
+			
+		self.frame += 1
+		if self.frame == self.num_frames:
+			if self.frame_loop < 0:
+				if not self.pending:
+					self.stop()
+			else:
+				self.frame = self.frame_loop
+				
+def get_pool_key(own):
+	
+	# objects with the same mesh, properties and skip are spread over the number of groups set by the property "phases"
+	
+	phases = max(own.get(PROP_NAME_PHASES, 1), 1)
+	phase = logic.uv_scroll_spawns % phases
+	logic.uv_scroll_spawns += 1
+	
+	props = tuple(own.get(name) for name in ("sprites", "sequence", "loop", "pingpong", PROP_NAME_SKIP, PROP_NAME_FRAME_RATE, PROP_NAME_CULL, PROP_NAME_CULL_DISTANCE))
+	return (own.meshes[0].name,) + props + (phase,)
+	
+def free_pool():
+	
+	# free the meshes of the pool groups whose users have all ended
+	# a group is only checked once its first user has ended, so this is cheap enough to run every frame
+	
+	for uv_scroll in list(logic.uv_scroll_pool):
+		users = uv_scroll.users
+		if users and not users[0].invalid:
+			continue
+		users[:] = [own for own in users if not own.invalid]
+		if not users:
+			logic.uv_scroll_pool.remove(uv_scroll)
+			logic.LibFree(uv_scroll.lib_name)
+			
+def is_placed_linked(own):
+	
+	# objects placed in the scene with the property "linked" keep the mesh they share, they never get a new one
+	
+	return own["linked"] and own.name not in own.scene.objectsInactive
+	
+def get_uv_scroll(own, always=None):
+	
+	# with the property "pool" the object is given the mesh of a group with the same pool key
+	# a group is only joined while its sequence is playing, so an object never starts on a stopped sequence
+	
+	if not own.get(PROP_NAME_POOL) or is_placed_linked(own):
+		return UVScroll(own, always)
+		
+	if not hasattr(logic, "uv_scroll_pool"):
+		logic.uv_scroll_pool = []
+		logic.uv_scroll_spawns = 0
+		
+	# without the manager no controller runs once the last user of a group has ended, so the pool is also freed after drawing
+	
+	if free_pool not in own.scene.post_draw:
+		own.scene.post_draw.append(free_pool)
+		
+	free_pool()
+	pool_key = get_pool_key(own)
+	
+	for uv_scroll in logic.uv_scroll_pool:
+		if uv_scroll.pool_key == pool_key and uv_scroll.frame < uv_scroll.num_frames:
+			own.replaceMesh(uv_scroll.mesh)
+			uv_scroll.users.append(own)
+			return uv_scroll
+			
+	uv_scroll = UVScroll(own, always, pool_key)
+	logic.uv_scroll_pool.append(uv_scroll)
+	return uv_scroll
+	
+class UVScrollManager:
+	
+	def __init__(self, cont):
+		
+		# scroll all objects with the boolean property "manager" from the controller of one object
+		# objects are registered when the scene holds an object not seen before
+		# added objects are appended to the scene objects, so checking the number and the last object finds them,
+		# also when as many objects end in the same tic
+		# objects sharing a mesh form a group that is scrolled once per tic, skipping tics as set by the property "skip"
+		
+		self.scene = cont.owner.scene
+		self.objects = set()
+		self.num_objects = -1
+		self.groups = {}
 		
+	def has_new_objects(self):
+		objects = self.scene.objects
+		return len(objects) != self.num_objects or (objects and objects[len(objects) - 1] not in self.objects)
+		
+	def add_objects(self):
+		objects = set(self.scene.objects)
+		for own in objects - self.objects:
+			if "uv_scroll" in own or not own.get(PROP_NAME_MANAGER):
+				continue
+			uv_scroll = own["uv_scroll"] = get_uv_scroll(own)
+			key = (uv_scroll.mesh.name, uv_scroll.mat_id)
+			if key not in self.groups:
+				uv_scroll.skip = own.get(PROP_NAME_SKIP, 0)
+				uv_scroll.tics = 0
+				self.groups[key] = uv_scroll
+				continue
+			group = self.groups[key]
+			if group is not uv_scroll:
+				group.users.append(own)
+				own["uv_scroll"] = group
+		self.objects = objects
+		self.num_objects = len(objects)
+		
+	def main(self):
+		if self.has_new_objects():
+			self.add_objects()
+			
+		for key, uv_scroll in list(self.groups.items()):
+			users = uv_scroll.users
+			if not users or users[0].invalid:
+				users[:] = [own for own in users if not own.invalid]
+				if not users:
+					del self.groups[key]
+					if uv_scroll.pool_key is not None:
+						free_pool()
+					continue
+			if uv_scroll.tics < uv_scroll.skip:
+				uv_scroll.tics += 1
+				continue
+			uv_scroll.tics = 0
+			uv_scroll.main()
+			
 def main(cont):
 	if not cont.sensors[0].positive:
 		return
 	own = cont.owner
 	if "uv_scroll" not in own:
-		own["uv_scroll"] = UVScroll(cont)
-	own["uv_scroll"].main()
+		own["uv_scroll"] = get_uv_scroll(own, cont.sensors[0])
+	uv_scroll = own["uv_scroll"]
+	
+	# objects of a pool group share the state, it is advanced by the controller of the first user only
+	
+	if uv_scroll.users[0].invalid:
+		uv_scroll.users[:] = [o for o in uv_scroll.users if not o.invalid]
+		uv_scroll.always = cont.sensors[0]
+	if uv_scroll.users[0] is own:
+		uv_scroll.main()
+	if uv_scroll.stopped:
+		cont.sensors[0].usePosPulseMode = False
+	
+def manager(cont):
+	if not cont.sensors[0].positive:
+		return
+	own = cont.owner
+	if "uv_scroll_manager" not in own:
+		own["uv_scroll_manager"] = UVScrollManager(cont)
+	own["uv_scroll_manager"].main()
 	
\ No newline at end of file
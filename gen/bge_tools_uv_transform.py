@@ -23,6 +23,7 @@ class UVTransform:
 	def __init__(self, cont):
 		
 		# get references to the owner, mesh, material id and skipped tics
+		# with the properties "cull" and "cull_distance" the uv coordinates are not updated while the owner is out of view
 		
 		def get_mat_id(mesh, identifier="_UV"):
 			
@@ -35,11 +36,25 @@ class UVTransform:
 					return mat_id
 			return -1
 			
+		def get_radius(mesh):
+			
+			# get the radius of the sphere around the origin holding all vertices, for the frustum test
+			
+			radius = 0.0
+			for mat_id in range(mesh.numMaterials):
+				for i in range(mesh.getVertexArrayLength(mat_id)):
+					radius = max(radius, mesh.getVertex(mat_id, i).XYZ.length)
+			return radius
+			
 		self.own = cont.owner
 		self.mesh = self.own.meshes[0]
 		self.mat_id = get_mat_id(self.mesh)
 		self.always = cont.sensors[0]
 		self.skipped = self.always.skippedTicks
+		self.cull = self.own.get("cull", False)
+		self.cull_distance = self.own.get("cull_distance", 0.0)
+		self.radius = get_radius(self.mesh) if self.cull else 0.0
+		self.pending = None
 		
 		self.ref_obj = self.get_object(self.own["ref_obj_name"])
 		self.ref_obj_offset = Matrix.Translation(Vector((0.5, 0.5, 0))) * self.own.worldTransform.inverted() * self.ref_obj.worldTransform
@@ -49,6 +64,25 @@ class UVTransform:
 		else:
 			self.ref_obj_trans = Matrix.Identity(4)
 			
+	def is_visible(self):
+		
+		# return whether the owner is visible, closer to the active camera than the cull distance and, with cull, inside its frustum
+		# without a camera the owner is visible
+		
+		if not self.cull and not self.cull_distance:
+			return True
+			
+		cam = self.own.scene.active_camera
+		if cam is None:
+			return True
+		if not self.own.visible:
+			return False
+		if self.cull_distance and self.own.getDistanceTo(cam) > self.cull_distance:
+			return False
+		if self.cull and cam.sphereInsideFrustum(self.own.worldPosition, self.radius * max(abs(i) for i in self.own.worldScale)) == cam.OUTSIDE:
+			return False
+		return True
+		
 	def get_transform(self, props):
 		loop, direction, timer, speed, time, pingpong = props
 		transform = speed * direction
@@ -67,6 +101,7 @@ class UVTransform:
 	# if rotating over time and the loop is not finished, add rotate to the matrix on center
 	# if scaling over time and the loop is not finished, add scale to the matrix on center
 	# transform uv coordinates to the matrix
+	# while not visible, accumulate the matrices and transform uv coordinates to all of them once visible again
 		
 	def main(self):
 		self.ref_obj = self.get_object(self.own["ref_obj_name"])
@@ -82,6 +117,14 @@ class UVTransform:
 		rotation_delta = origin * Matrix.Rotation(self.own["ang_speed"], 4, "Z") * origin.inverted()
 		matrix = ref_obj_delta * translation_delta * rotation_delta
 		
+		if self.pending is not None:
+			matrix = matrix * self.pending
+			
+		if not self.is_visible():
+			self.pending = matrix
+			return
+			
+		self.pending = None
 		self.mesh.transformUV(self.mat_id, matrix, 0)
 		
 def main(cont):
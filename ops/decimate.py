@@ -0,0 +1,262 @@
+import heapq, numpy
+
+# quadric error decimation of triangle meshes stored as arrays
+# no Blender modules are used, so this can run headless
+
+# collapses turning a remaining face by more than 60 degrees are rejected, as they fold it over or stand it up
+
+MIN_NORMAL_COS = 0.5
+
+def get_quadrics(co, tris):
+	
+	# returns the area weighted sum of the plane quadrics of the triangles around every vertex
+	
+	v0, v1, v2 = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+	normals = numpy.cross(v1 - v0, v2 - v0)
+	double_areas = numpy.linalg.norm(normals, axis=1)
+	valid = double_areas > 0
+	planes = numpy.zeros((len(tris), 4))
+	planes[valid, :3] = normals[valid] / double_areas[valid, None]
+	planes[:, 3] = -numpy.einsum("ij,ij->i", planes[:, :3], v0)
+	
+	quadrics = numpy.einsum("ij,ik->ijk", planes, planes) * (double_areas * 0.5)[:, None, None]
+	vert_quadrics = numpy.zeros((len(co), 4, 4))
+	for k in range(3):
+		numpy.add.at(vert_quadrics, tris[:, k], quadrics)
+	return vert_quadrics
+	
+def get_discontinuous(tris, num_verts, values):
+	
+	# returns a mask of the vertices whose triangle corners do not share the same values
+	# values holds one row per corner, in the order of tris.ravel()
+	
+	values = numpy.asarray(values, dtype=numpy.float64).reshape(len(tris) * 3, -1)
+	corner_verts = tris.ravel()
+	mask = numpy.zeros(num_verts, dtype=numpy.bool_)
+	for column in values.T:
+		low = numpy.full(num_verts, numpy.inf)
+		high = numpy.full(num_verts, -numpy.inf)
+		numpy.minimum.at(low, corner_verts, column)
+		numpy.maximum.at(high, corner_verts, column)
+		mask |= low < high
+	return mask
+	
+def decimate(co, tris, ratio, locked=None):
+	
+	# collapses edges into one of their vertices until the number of triangles is reduced to ratio
+	# locked vertices are never removed, so borders made of locked vertices are kept exactly
+	# vertices are never moved, so the attributes of the remaining corners stay valid
+	# returns the indices of the remaining vertices, the triangles indexing them,
+	# and for every triangle corner the index of the original corner, in the order of tris.ravel(), to take attributes from
+	
+	co = numpy.asarray(co, dtype=numpy.float64).reshape(-1, 3)
+	tris = numpy.asarray(tris, dtype=numpy.int64).reshape(-1, 3)
+	num_verts = len(co)
+	num_tris = len(tris)
+	
+	if locked is None:
+		locked = numpy.zeros(num_verts, dtype=numpy.bool_)
+		
+	quadrics = get_quadrics(co, tris)
+	co_h = numpy.hstack((co, numpy.ones((num_verts, 1))))
+	
+	faces = tris.tolist()
+	corners = numpy.arange(num_tris * 3).reshape(num_tris, 3).tolist()
+	face_alive = [True] * num_tris
+	vert_faces = [set() for i in range(num_verts)]
+	for f, face in enumerate(faces):
+		for v in face:
+			vert_faces[v].add(f)
+			
+	locked = locked.tolist()
+	stamps = [0] * num_verts
+	
+	def get_cost(u, v):
+		p = co_h[v]
+		return float(p.dot(quadrics[u] + quadrics[v]).dot(p))
+		
+	def get_normal(a, b, c):
+		return numpy.cross(co[b] - co[a], co[c] - co[a])
+		
+	# initial candidates, both directions of every edge whose first vertex is not locked
+	
+	edges = numpy.sort(tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+	edges = numpy.unique(edges[:, 0] * num_verts + edges[:, 1])
+	edges = numpy.stack((edges // num_verts, edges % num_verts), axis=1)
+	edges = numpy.vstack((edges, edges[:, ::-1]))
+	edges = edges[~numpy.asarray(locked)[edges[:, 0]]]
+	
+	p = co_h[edges[:, 1]]
+	costs = numpy.einsum("ni,nij,nj->n", p, quadrics[edges[:, 0]] + quadrics[edges[:, 1]], p)
+	heap = [(cost, u, v, 0, 0) for cost, (u, v) in zip(costs.tolist(), edges.tolist())]
+	heapq.heapify(heap)
+	
+	num_alive = num_tris
+	target = max(int(num_tris * ratio), 0)
+	
+	while num_alive > target and heap:
+		cost, u, v, stamp_u, stamp_v = heapq.heappop(heap)
+		
+		if stamps[u] != stamp_u or stamps[v] != stamp_v:
+			continue
+			
+		faces_u = vert_faces[u]
+		faces_v = vert_faces[v]
+		shared = faces_u & faces_v
+		if not shared:
+			continue
+			
+		# keep the mesh manifold: the only common neighbours of u and v are the opposite vertices of the shared faces
+		
+		neighbours_u = {w for f in faces_u for w in faces[f]}
+		neighbours_v = {w for f in faces_v for w in faces[f]}
+		opposite = {w for f in shared for w in faces[f]}
+		if (neighbours_u & neighbours_v) != opposite:
+			continue
+			
+		# reject collapses that flip, fold or degenerate a remaining face
+		
+		flipped = False
+		for f in faces_u - shared:
+			face = faces[f]
+			before = get_normal(*face)
+			after = get_normal(*[v if w == u else w for w in face])
+			d = before.dot(after)
+			if before.any() and (d <= 0 or d * d <= MIN_NORMAL_COS ** 2 * before.dot(before) * after.dot(after)):
+				flipped = True
+				break
+		if flipped:
+			continue
+			
+		# the corner of v in a shared face lies on the same side as u, use it for the faces moving from u to v
+		
+		f = next(iter(shared))
+		corner_v = corners[f][faces[f].index(v)]
+		
+		for f in shared:
+			face_alive[f] = False
+			num_alive -= 1
+			for w in faces[f]:
+				vert_faces[w].discard(f)
+				
+		for f in faces_u:
+			k = faces[f].index(u)
+			faces[f][k] = v
+			corners[f][k] = corner_v
+			faces_v.add(f)
+			
+		vert_faces[u] = set()
+		quadrics[v] += quadrics[u]
+		stamps[u] += 1
+		stamps[v] += 1
+		
+		for w in {w for f in faces_v for w in faces[f]} - {v}:
+			if not locked[v]:
+				heapq.heappush(heap, (get_cost(v, w), v, w, stamps[v], stamps[w]))
+			if not locked[w]:
+				heapq.heappush(heap, (get_cost(w, v), w, v, stamps[w], stamps[v]))
+				
+	alive = numpy.array(face_alive, dtype=numpy.bool_)
+	faces = numpy.array(faces, dtype=numpy.int64).reshape(-1, 3)[alive]
+	corners = numpy.array(corners, dtype=numpy.int64).reshape(-1, 3)[alive]
+	verts, tris_out = numpy.unique(faces, return_inverse=True)
+	
+	return verts, tris_out.reshape(-1, 3), corners
+	
+def get_boundary(tris, num_verts):
+	
+	# returns a mask of the vertices on edges used by one triangle only
+	
+	edges = numpy.sort(tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+	edges, counts = numpy.unique(edges[:, 0] * num_verts + edges[:, 1], return_counts=True)
+	edges = edges[counts == 1]
+	mask = numpy.zeros(num_verts, dtype=numpy.bool_)
+	mask[edges // num_verts] = True
+	mask[edges % num_verts] = True
+	return mask
+	
+def triangulate_arrays(arrays):
+	
+	# returns the loops of the fan triangulation of the polygons of arrays and the polygon of every triangle
+	
+	loop_start = arrays["loop_start"]
+	num_tris = numpy.maximum(arrays["loop_total"] - 2, 0)
+	tri_poly = numpy.repeat(numpy.arange(len(loop_start)), num_tris)
+	offsets = numpy.cumsum(num_tris) - num_tris
+	fan = numpy.arange(num_tris.sum()) - numpy.repeat(offsets, num_tris) + 1
+	starts = loop_start[tri_poly]
+	return numpy.stack((starts, starts + fan, starts + fan + 1), axis=1), tri_poly
+	
+def get_flagged(arrays):
+	
+	# returns a mask of the edges of arrays that are sharp, seams, creased or beveled
+	
+	return arrays["edge_sharp"] | arrays["edge_seam"] | (arrays["edge_crease"] > 0) | (arrays["edge_bevel_weight"] > 0)
+	
+def decimate_arrays(arrays, ratio, lock_attributes=True):
+	
+	# decimates mesh arrays as returned by utils.get_mesh_arrays
+	# polygons are triangulated as fans, bounds are locked, as are uv seams, vertex color borders,
+	# material borders and flagged edges with lock_attributes
+	# vertex colors, vertex bevel weights and the flags of the edges left between remaining vertices are carried over
+	
+	uvs = arrays["uvs"]
+	colors = arrays.get("colors")
+	
+	tri_loops, tri_poly = triangulate_arrays(arrays)
+	tris = arrays["loop_vert"][tri_loops]
+	num_verts = len(arrays["co"])
+	
+	corner_loops = tri_loops.ravel()
+	corner_polys = numpy.repeat(tri_poly, 3)
+	
+	locked = arrays["bounds"]
+	if lock_attributes:
+		corner_values = [uv[corner_loops] for uv in uvs] + [arrays["material_index"][corner_polys, None]]
+		if colors is not None:
+			corner_values += [color[corner_loops] for color in colors]
+		locked = locked | get_discontinuous(tris, num_verts, numpy.hstack(corner_values))
+		if "edge_verts" in arrays:
+			locked = locked.copy()
+			locked[arrays["edge_verts"][get_flagged(arrays)].ravel()] = True
+			
+	verts, tris_out, corners = decimate(arrays["co"], tris, ratio, locked)
+	
+	loops = corner_loops[corners.ravel()]
+	polys = corner_polys[corners[:, 0]]
+	
+	arrays_lod = {
+		"co": arrays["co"][verts],
+		"loop_vert": tris_out.ravel().astype(numpy.int32),
+		"loop_start": numpy.arange(0, len(tris_out) * 3, 3, dtype=numpy.int32),
+		"loop_total": numpy.full(len(tris_out), 3, dtype=numpy.int32),
+		"material_index": arrays["material_index"][polys],
+		"use_smooth": arrays["use_smooth"][polys],
+		"uv_names": arrays["uv_names"],
+		"uvs": uvs[:, loops],
+		"bounds": arrays["bounds"][verts]
+	}
+	
+	if colors is not None:
+		arrays_lod["color_names"] = arrays["color_names"]
+		arrays_lod["colors"] = colors[:, loops]
+		
+	if "vert_bevel_weight" in arrays:
+		arrays_lod["vert_bevel_weight"] = arrays["vert_bevel_weight"][verts]
+		
+	if "edge_verts" in arrays:
+		
+		# the flagged edges whose vertices remain and are still joined by a triangle keep their flags
+		
+		vert_map = numpy.full(num_verts, -1, dtype=numpy.int64)
+		vert_map[verts] = numpy.arange(len(verts))
+		flagged = get_flagged(arrays)
+		edge_verts = vert_map[arrays["edge_verts"][flagged]]
+		edge_keys = numpy.sort(edge_verts, axis=1)
+		tri_edges = numpy.sort(tris_out[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+		kept = (edge_keys[:, 0] >= 0) & numpy.isin(edge_keys[:, 0] * len(verts) + edge_keys[:, 1], tri_edges[:, 0] * len(verts) + tri_edges[:, 1])
+		arrays_lod["edge_verts"] = edge_verts[kept].astype(numpy.int32)
+		for name in ("edge_sharp", "edge_seam", "edge_crease", "edge_bevel_weight"):
+			arrays_lod[name] = arrays[name][flagged][kept]
+			
+	return arrays_lod
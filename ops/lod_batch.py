@@ -0,0 +1,227 @@
+import bpy, os, sys, json, time, argparse, importlib, subprocess, tempfile, shutil, traceback
+
+# generates lod sections for objects of many blend files from the command line
+# usage: blender --background --factory-startup --python lod_batch.py -- [options] file.blend[:object,object] ...
+# without object names the active object of a file is used, settings not given default to those of the LODSections operator
+# every file is processed by a background Blender process of its own, the add-on has to be installed for the game logic text
+
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLEND_EXT = ".blend"
+
+def load_package():
+	sys.path.insert(0, os.path.dirname(ADDON_PATH))
+	return importlib.import_module(os.path.basename(ADDON_PATH))
+	
+def get_default_settings(operator):
+	
+	# returns the defaults of the prop_* properties of operator, clear is replaced by update
+	
+	if not operator.is_registered:
+		bpy.utils.register_class(operator)
+		
+	settings = {}
+	for prop in operator.bl_rna.properties:
+		if not prop.identifier.startswith("prop_"):
+			continue
+		if getattr(prop, "array_length", 0):
+			settings[prop.identifier] = list(prop.default_array)
+		else:
+			settings[prop.identifier] = prop.default
+			
+	settings["prop_update_or_clear"] = "update"
+	return settings
+	
+def parse_value(s):
+	try:
+		return json.loads(s)
+	except ValueError:
+		return s
+		
+def parse_args(argv):
+	
+	parser = argparse.ArgumentParser(prog="lod_batch.py", description="Generates LOD sections for objects of many blend files")
+	parser.add_argument("files", nargs="*", metavar="file", help="blend file, optionally followed by :object,object")
+	parser.add_argument("--workers", type=int, default=0, help="number of files processed at once; 0 uses all cores")
+	parser.add_argument("--settings", help="json file mapping operator property names to values")
+	parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="operator property, the value is parsed as json")
+	parser.add_argument("--report", help="json file to write the timings and failures per file to")
+	parser.add_argument("--no-save", action="store_true", help="do not save the blend files")
+	parser.add_argument("--verbose", action="store_true", help="show the output of the worker processes")
+	parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+	parser.add_argument("--objects", default="", help=argparse.SUPPRESS)
+	parser.add_argument("--result", help=argparse.SUPPRESS)
+	
+	return parser, parser.parse_args(argv)
+	
+def get_settings(parser, args, operator):
+	
+	settings = get_default_settings(operator)
+	
+	values = {}
+	if args.settings:
+		with open(args.settings) as f:
+			values.update(json.load(f))
+	for item in args.set:
+		name, sep, value = item.partition("=")
+		if not sep:
+			parser.error("expected NAME=VALUE: " + item)
+		values[name] = parse_value(value)
+		
+	for name, value in values.items():
+		if not name.startswith("prop_"):
+			name = "prop_" + name
+		if name not in settings:
+			parser.error("unknown setting: " + name)
+		settings[name] = value
+		
+	return settings
+	
+def split_file(spec):
+	
+	# returns the path and the object names of file.blend:object,object
+	
+	i = spec.rfind(BLEND_EXT + ":")
+	if i == -1:
+		return spec, []
+	i += len(BLEND_EXT)
+	return spec[:i], [name for name in spec[i + 1:].split(",") if name]
+	
+def run_worker(args):
+	
+	# runs in the background Blender process that opened the blend file
+	
+	lg = load_package().ops.lod_generator
+	
+	with open(args.settings) as f:
+		settings = json.load(f)
+		
+	scene = bpy.context.scene
+	
+	names = [name for name in args.objects.split(",") if name]
+	if not names and scene.objects.active:
+		names = [scene.objects.active.name]
+		
+	result = {"objects": []}
+	
+	for name in names:
+		entry = {"name": name}
+		start = time.perf_counter()
+		
+		try:
+			ob = scene.objects[name]
+			for o in scene.objects:
+				o.select = False
+			ob.select = True
+			scene.objects.active = ob
+			
+			generator = lg.Generator(bpy.context, scene, ob, settings)
+			generator.run()
+			
+			if generator.err_msg:
+				entry["error"] = generator.err_msg
+			else:
+				entry["sections"] = len(getattr(generator, "data", ()))
+				
+		except Exception:
+			entry["error"] = traceback.format_exc()
+			
+		entry["time"] = time.perf_counter() - start
+		result["objects"].append(entry)
+		
+	if not names:
+		result["error"] = "No object given and no active object"
+	elif not args.no_save and any("error" not in entry for entry in result["objects"]):
+		bpy.ops.wm.save_mainfile()
+		
+	with open(args.result, "w") as f:
+		json.dump(result, f)
+		
+def run_batch(parser, args):
+	
+	operator = load_package().ops.lod_sections.LODSections
+	settings = get_settings(parser, args, operator)
+	
+	if not args.files:
+		parser.error("no blend files given")
+		
+	num_workers = min(args.workers or os.cpu_count() or 1, len(args.files))
+	tmp_dir = tempfile.mkdtemp(prefix="bge_tools_lod_batch_")
+	
+	try:
+		settings_path = os.path.join(tmp_dir, "settings.json")
+		with open(settings_path, "w") as f:
+			json.dump(settings, f)
+			
+		pending = list(enumerate(args.files))
+		running = []
+		results = [None] * len(args.files)
+		start = time.perf_counter()
+		
+		while pending or running:
+			
+			while pending and len(running) < num_workers:
+				i, spec = pending.pop(0)
+				file_path, names = split_file(spec)
+				result_path = os.path.join(tmp_dir, "result_" + str(i) + ".json")
+				cmd = [
+					bpy.app.binary_path, "--background", "--factory-startup", os.path.abspath(file_path),
+					"--python", os.path.abspath(__file__), "--",
+					"--worker", "--settings", settings_path, "--result", result_path, "--objects", ",".join(names)
+				]
+				if args.no_save:
+					cmd.append("--no-save")
+				output = None if args.verbose else subprocess.DEVNULL
+				process = subprocess.Popen(cmd, stdout=output, stderr=output)
+				running.append((i, file_path, result_path, process, time.perf_counter()))
+				
+			for job in list(running):
+				i, file_path, result_path, process, job_start = job
+				if process.poll() is None:
+					continue
+				running.remove(job)
+				
+				if os.path.exists(result_path):
+					with open(result_path) as f:
+						result = json.load(f)
+				else:
+					result = {"objects": [], "error": "Worker exited with code " + str(process.returncode)}
+				result["file"] = file_path
+				result["time"] = time.perf_counter() - job_start
+				results[i] = result
+				
+				failed = "error" in result or any("error" in entry for entry in result["objects"])
+				print("FAILED" if failed else "OK    ", "{:8.1f} s".format(result["time"]), file_path)
+				for entry in result["objects"]:
+					if "error" in entry:
+						print("       ", entry["name"] + ":", entry["error"])
+				if "error" in result:
+					print("       ", result["error"])
+					
+			time.sleep(0.1)
+			
+	finally:
+		shutil.rmtree(tmp_dir, ignore_errors=True)
+		
+	failures = [result for result in results if "error" in result or any("error" in entry for entry in result["objects"])]
+	
+	print("Processed", len(results), "files,", len(failures), "failed, in", "{:.1f} s".format(time.perf_counter() - start))
+	
+	if args.report:
+		with open(args.report, "w") as f:
+			json.dump({"settings": settings, "files": results}, f, indent="\t")
+			
+	return 1 if failures else 0
+	
+def main():
+	
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	parser, args = parse_args(argv)
+	
+	if args.worker:
+		run_worker(args)
+	else:
+		sys.exit(run_batch(parser, args))
+		
+if __name__ == "__main__":
+	main()
+	
@@ -0,0 +1,1129 @@
+import bpy, bmesh, math, numpy
+from mathutils import Vector, Matrix
+from collections import OrderedDict
+from . import utils as ut, decimate as dc
+
+ERR_MSG_OBJECT_NOT_FOUND = "Object not found"
+
+PREF = "_"
+PART = "_PART"
+TEMP = "_TEMP"
+BASE = "_BASE"
+SECT = "_SECT"
+LOD = "_LOD"
+PHYS = "_PHYS"
+NUMB = ".000"
+BOUNDS = "_BOUNDS"
+PROP = "BGE_TOOLS_LOD_SECTIONS"
+PROP_BUDGET = PROP + "_BUDGET"
+PROP_POOL = PROP + "_POOL"
+PROP_HYSTERESIS = PROP + "_HYSTERESIS"
+PROP_STREAM_DISTANCE = PROP + "_STREAM_DISTANCE"
+PROP_STREAM_OBJECTS = PROP + "_STREAM_OBJECTS"
+PROP_STREAM_TIME = PROP + "_STREAM_TIME"
+PROP_HASHES = PROP + "_HASHES"
+PROP_SETTINGS = PROP + "_SETTINGS"
+PROP_ORIGIN = PROP + "_ORIGIN"
+CACHE = PROP + "_CACHE"
+PROFILE = "_PROFILE"
+GRID = "_GRID"
+SCRIPT = "bge_tools_lod_sections"
+TEXT = ut.BGE_TOOLS_OT + "lod_sections"
+
+class Generator:
+	
+	# generates the lod sections of ob, as done by the LODSections operator and by lod_batch
+	# settings maps the names of the prop_* properties of the operator to their values
+	
+	def __init__(self, context, scene, ob, settings):
+		
+		self.context = context
+		self.scene = scene
+		self.object = ob
+		
+		for name, value in settings.items():
+			setattr(self, name, value)
+			
+		self.err_msg = ""
+		self.log_msg = ""
+		
+	def run(self):
+		
+		self.prefix = self.prop_custom_prefix if self.prop_use_custom_prefix else PREF
+		
+		if PROP in self.object.game.properties:
+			sections_name = self.object.game.properties[PROP].value
+			
+			try:
+				sections = self.scene.objects[sections_name]
+				
+				for prop_name in (PROP, PROP_BUDGET, PROP_POOL, PROP_HYSTERESIS, PROP_STREAM_DISTANCE, PROP_STREAM_OBJECTS, PROP_STREAM_TIME):
+					i = self.object.game.properties.find(prop_name)
+					if i != -1:
+						bpy.ops.object.game_property_remove(index=i)
+						
+				ut.remove_logic_python(self.object, SCRIPT)
+				ut.remove_text(SCRIPT)
+				
+			except KeyError:
+				self.err_msg = ERR_MSG_OBJECT_NOT_FOUND + ": " + sections_name
+				
+				return {"CANCELLED"}
+				
+			if self.prop_update_or_clear == "clear":
+				self.remove_sections(sections)
+				
+				return {"FINISHED"}
+				
+			self.previous = sections
+		else:
+			self.previous = None
+			
+		print("\nLOD Sections\n------------\n")
+		
+		self.prof = ut.Profiler()
+		self.sections = None
+		
+		stages = (
+			self.store_initial_state,
+			self.collect_data,
+			self.create_base,
+			self.dissolve,
+			self.cache_base,
+			self.generate_sections,
+			self.generate_lod,
+			self.convert_particles,
+			self.join_particles,
+			self.copy_normals,
+			self.generate_lod_materials,
+			self.export_normals,
+			self.generate_physics,
+			self.finalize,
+			self.generate_game_logic,
+			self.restore_initial_state,
+			self.log
+		)
+		
+		for stage in stages:
+			self.prof.measure(stage.__name__, stage, self.get_counts)
+			
+		self.save_profile()
+		
+		return {"FINISHED"}
+		
+	def remove_sections(self, sections):
+		
+		meshes = set()
+		for ob in sections.children:
+			meshes.add(ob.data)
+			ut.remove(ob, False)
+		materials = set()
+		for me in meshes:
+			for mat in me.materials:
+				if not mat.name.startswith(self.prefix):
+					continue
+				materials.add(mat)
+			ut.remove(me)
+		for mat in materials:
+			ut.remove(mat)
+		ut.remove(sections, False)
+		
+	def get_section_id(self, location, factor=1.0):
+		
+		index = ut.get_grid_index(location, self.number, self.size, factor)
+		if index is None:
+			return None
+		i, j = index
+		return self.ids[j * int(self.number.x) + i]
+		
+	def store_initial_state(self):
+		
+		bpy.ops.object.mode_set(mode="OBJECT")
+		
+		self.undo = self.context.user_preferences.edit.use_global_undo
+		self.context.user_preferences.edit.use_global_undo = False
+		
+		self.cursor_location = self.scene.cursor_location.copy()
+		self.scene.cursor_location = Vector()
+		
+		self.hide_render = self.object.hide_render
+		self.hide = self.object.hide
+		
+	def collect_data(self):
+		
+		print(self.prof.timed("Collecting data"))
+		
+		self.number = Vector()
+		self.size = Vector()
+		
+		dimensions = ut.dimensions(self.object).xy
+		
+		if self.prop_number_or_size == "generate_by_number":
+			self.number.x = self.prop_number[0]
+			self.number.y = self.prop_number[1]
+			self.size.x = dimensions.x / self.number.x
+			self.size.y = dimensions.y / self.number.y
+		else:
+			self.size.x = self.prop_size[0]
+			self.size.y = self.prop_size[1]
+			n_x = math.ceil(dimensions.x / self.size.x)
+			n_y = math.ceil(dimensions.y / self.size.y)
+			
+			numb_mode = self.prop_number_mode
+			if numb_mode == "use_automatic_numbering":
+				self.number.x = n_x
+				self.number.y = n_y
+			else:
+				i = 0 if numb_mode == "use_even_numbers" else 1
+				self.number.x = n_x + 1 - i if n_x % 2 else n_x + i
+				self.number.y = n_y + 1 - i if n_y % 2 else n_y + i
+				
+		self.ndigits = len(str(int(self.number.x * self.number.y)))
+		self.points = OrderedDict()
+		
+		n = 1
+		for j in range(int(self.number.y)):
+			y = 0.5 * self.size.y * (2 * j + 1 - self.number.y)
+			for i in range(int(self.number.x)):
+				x = 0.5 * self.size.x * (2 * i + 1 - self.number.x)
+				id = ut.get_id(n, "", self.ndigits)
+				self.points[id] = Vector((x, y, 0))
+				n += 1
+				
+		self.ids = list(self.points)
+		
+		self.particles = {}
+		self.data = {}
+		self.reused = {}
+		self.renormals = {}
+		self.hashes = {}
+		self.hashes_previous = {}
+		self.physics_report = OrderedDict()
+		
+		if self.prop_lod_use_distance:
+			self.lod_distance = self.prop_lod_distance
+		else:
+			self.lod_distance = round(math.pi * math.sqrt(self.size.x * self.size.y) * 0.5)
+		self.normals_previous = None
+		self.origin = None
+		
+		self.cache = ut.Cache(self.prop_cache_size * 1024 ** 2, CACHE) if self.prop_use_cache else None
+		self.cache_keys = {}
+		self.base_key = None
+		self.base_cached = False
+		
+		self.settings = ut.get_hash([
+			list(self.number), list(self.size), [list(row) for row in self.object.matrix_world],
+			self.prop_use_decimate_dissolve, self.prop_decimate_dissolve_angle_limit,
+			self.prop_use_lod, self.prop_lod_number, self.prop_lod_factor, self.prop_lod_use_distance, self.prop_lod_distance,
+			self.prop_lod_use_physics, self.prop_lod_backend, self.prop_use_approx, self.prop_approx_num_digits, self.prefix,
+			self.prop_use_streaming, self.prop_streaming_rows,
+			self.prop_lod_physics_mode, self.prop_lod_physics_ratio, self.prop_lod_physics_num_tris,
+			self.prop_lod_physics_flat_bounds, self.prop_lod_physics_flat_tolerance
+		])
+		
+		if self.previous:
+			
+			# sections are only updated per cell if nothing but the mesh changed and nothing depends on the whole mesh
+			
+			has_particles = any(mod.type == "PARTICLE_SYSTEM" and mod.show_viewport and mod.particle_system.settings.dupli_object for mod in self.object.modifiers)
+			
+			if self.previous.get(PROP_SETTINGS) == self.settings and PROP_HASHES in self.previous and not has_particles:
+				self.normals_previous = ut.load_normals(PROP, self.object.name)
+				
+			if self.normals_previous is not None:
+				print(self.prof.timed("Updating changed sections only"))
+				self.hashes_previous = self.previous[PROP_HASHES].to_dict()
+				self.origin = Vector(self.previous[PROP_ORIGIN])
+				self.sections = self.previous
+				self.export_grid()
+				return
+				
+			self.remove_sections(self.previous)
+			
+		bpy.ops.object.empty_add()
+		self.sections = self.scene.objects.active
+		self.sections.name = self.prefix + self.object.name
+		self.sections.select = False
+		
+		self.export_grid()
+		
+	def export_grid(self):
+		
+		# the runtime finds the sections around the camera with the grid instead of checking every section
+		
+		grid = OrderedDict()
+		grid["number"] = [int(self.number.x), int(self.number.y)]
+		grid["size"] = [self.size.x, self.size.y]
+		grid["base_name"] = self.sections.name + SECT
+		grid["ids"] = self.ids
+		grid["lod_distance"] = self.lod_distance
+		
+		ut.save_json(grid, PROP, self.object.name + GRID)
+		
+	def create_base(self):
+		
+		print(self.prof.timed("Creating base"))
+		
+		if self.cache:
+			
+			# meshes with layers the cache does not hold and modifiers reading data that can not be hashed are not cached
+			
+			inputs = ut.get_modifier_inputs(self.object)
+			if inputs is None or ut.has_uncached_layers(self.object.data):
+				print(self.prof.timed("Not caching, the input holds data the cache can not"))
+				self.cache = None
+				
+		if self.cache:
+			
+			# the base depends on the mesh, the modifiers, the data they read and the transform of the object and on dissolve
+			# vertex group weights and shape keys drive modifiers, custom normals are copied to the sections
+			
+			self.base_key = "base_" + self.cache.get_key(
+				ut.get_arrays_hash(ut.get_mesh_arrays(self.object.data)),
+				ut.get_arrays_hash(ut.get_deform_arrays(self.object)),
+				[ut.get_rna_values(mod) for mod in self.object.modifiers if mod.type != "PARTICLE_SYSTEM"],
+				inputs,
+				[list(row) for row in self.object.matrix_world], self.origin and list(self.origin),
+				self.prop_use_decimate_dissolve, self.prop_decimate_dissolve_angle_limit
+			)
+			arrays = self.cache.get(self.base_key)
+			
+			if arrays is not None:
+				print(self.prof.timed("Loading cached base"))
+				
+				self.base = ut.new_object(self.scene, self.sections.name + BASE, arrays, self.object.data.materials)
+				self.base.game.physics_type = "NO_COLLISION"
+				self.materials = set(self.base.data.materials)
+				self.transform = Matrix(arrays["transform"].tolist())
+				self.base_cached = True
+				return
+				
+		self.scene.objects.active = self.object
+		self.object.select = True
+		bpy.ops.object.duplicate()
+		self.object.select = False
+		
+		self.base = self.scene.objects.active
+		self.base.data.name = self.base.name = self.sections.name + BASE
+		
+		self.base.game.physics_type = "NO_COLLISION"
+		self.materials = set(self.base.data.materials)
+		
+		for mod in self.base.modifiers:
+			
+			if mod.type == "PARTICLE_SYSTEM":
+				bpy.ops.object.modifier_remove(modifier=mod.name)
+				continue
+				
+			print(self.prof.timed("Applying ", mod.name))
+			
+			bpy.ops.object.modifier_apply(apply_as="DATA", modifier=mod.name)
+			
+		for vertex_group in list(self.base.vertex_groups):
+			self.base.vertex_groups.remove(vertex_group)
+			
+		bpy.ops.object.parent_clear(type="CLEAR_KEEP_TRANSFORM")
+		if self.origin is None:
+			bpy.ops.object.origin_set(type="ORIGIN_GEOMETRY")
+		else:
+			self.scene.cursor_location = self.origin
+			bpy.ops.object.origin_set(type="ORIGIN_CURSOR")
+			self.scene.cursor_location = Vector()
+		self.transform = self.base.matrix_world.copy()
+		self.base.matrix_world = Matrix()
+		
+		bpy.ops.object.editmode_toggle()
+		bpy.ops.mesh.select_all()
+		bpy.ops.mesh.quads_convert_to_tris()
+		bpy.ops.mesh.select_all(action="DESELECT")
+		bpy.ops.object.editmode_toggle()
+		
+	def dissolve(self):
+		
+		if not self.prop_use_decimate_dissolve or self.base_cached:
+			return
+			
+		print(self.prof.timed("Applying Decimate Dissolve"))
+		
+		bpy.ops.object.editmode_toggle()
+		bpy.ops.mesh.select_all()
+		
+		bpy.ops.mesh.dissolve_limited(angle_limit=self.prop_decimate_dissolve_angle_limit, use_dissolve_boundaries=False, delimit={"NORMAL", "MATERIAL", "SEAM", "SHARP", "UV"})
+		
+		bpy.ops.mesh.quads_convert_to_tris()
+		bpy.ops.mesh.beautify_fill()
+		
+		bpy.ops.mesh.select_all(action="DESELECT")
+		bpy.ops.object.editmode_toggle()
+		
+	def cache_base(self):
+		
+		if not self.cache or self.base_cached:
+			return
+			
+		arrays = ut.get_mesh_arrays(self.base.data, with_normals=self.base.data.has_custom_normals)
+		arrays["transform"] = numpy.array([list(row) for row in self.transform])
+		self.cache.set(self.base_key, arrays)
+		
+	def generate_sections(self):
+		
+		print(self.prof.timed("Multisecting base"))
+		
+		self.previous_sections = {}
+		if self.hashes_previous:
+			base_name = self.sections.name + SECT
+			for ob in self.sections.children:
+				if ob.name.startswith(base_name):
+					self.previous_sections.setdefault(ob.name[len(base_name):len(base_name) + self.ndigits], []).append(ob)
+					
+		if self.prop_use_streaming:
+			
+			# only the faces overlapping a band of rows are sliced at once, the band is freed before the next one
+			# every band is built from the arrays of the base into a mesh of its own, so no bmesh of the whole base is made
+			# the arrays hold the uv maps, vertex colors and edge flags, other layers are not used by the game engine
+			
+			if ut.has_uncached_layers(self.base.data):
+				print(self.prof.timed("Streaming drops the layers of the base that mesh arrays do not hold"))
+				
+			arrays = ut.get_mesh_arrays(self.base.data)
+			loop_y = arrays["co"][arrays["loop_vert"], 1]
+			poly_min_y = numpy.minimum.reduceat(loop_y, arrays["loop_start"]) if len(loop_y) else loop_y
+			poly_max_y = numpy.maximum.reduceat(loop_y, arrays["loop_start"]) if len(loop_y) else loop_y
+			del loop_y
+			
+			num_x = int(self.number.x)
+			num_y = int(self.number.y)
+			bottom = -0.5 * self.number.y * self.size.y
+			margin = 0.0001
+			
+			for j0 in range(0, num_y, self.prop_streaming_rows):
+				j1 = min(j0 + self.prop_streaming_rows, num_y)
+				
+				print(self.prof.timed("Slicing rows ", j0 + 1, " to ", j1, " of ", num_y))
+				
+				y0 = bottom + j0 * self.size.y if j0 else -math.inf
+				y1 = bottom + j1 * self.size.y if j1 < num_y else math.inf
+				mask = (poly_max_y >= y0 - margin) & (poly_min_y <= y1 + margin)
+				if not mask.any():
+					continue
+					
+				band_me = bpy.data.meshes.new(self.sections.name + "_BAND")
+				ut.set_mesh_arrays(band_me, ut.get_polygons_arrays(arrays, mask))
+				
+				bm = bmesh.new()
+				bm.from_mesh(band_me)
+				ut.remove(band_me)
+				
+				ut.bisect_grid(bm, self.number, self.size)
+				self.add_sections(bm, self.ids[j0 * num_x:j1 * num_x])
+				
+				bm.free()
+				del bm
+				
+			del arrays
+			
+		else:
+			bm = bmesh.new()
+			bm.from_mesh(self.base.data)
+			
+			ut.bisect_grid(bm, self.number, self.size)
+			
+			print(self.prof.timed("Organizing sections"))
+			
+			self.add_sections(bm, self.ids)
+			
+			bm.free()
+			del bm
+			
+		if self.hashes_previous:
+			
+			# remove the objects of emptied cells
+			
+			for objects in self.previous_sections.values():
+				self.remove_section_objects(objects)
+				
+			# the normals of seam vertices depend on the faces on both sides, so reused neighbours of changed cells get them again
+			
+			num_x = int(self.number.x)
+			num_y = int(self.number.y)
+			indices = {id: k for k, id in enumerate(self.ids)}
+			for id in set(self.hashes) | set(self.hashes_previous):
+				if self.hashes.get(id) == self.hashes_previous.get(id):
+					continue
+				i, j = indices[id] % num_x, indices[id] // num_x
+				for n_j in range(max(j - 1, 0), min(j + 2, num_y)):
+					for n_i in range(max(i - 1, 0), min(i + 2, num_x)):
+						n_id = self.ids[n_j * num_x + n_i]
+						if n_id in self.reused:
+							self.renormals[n_id] = self.reused[n_id]
+							
+			print(self.prof.timed("Reusing ", len(self.reused), " of ", len(self.hashes), " sections, ", len(self.renormals), " with new normals"))
+			
+	def remove_section_objects(self, objects):
+		
+		meshes = set()
+		for ob in objects:
+			meshes.add(ob.data)
+			ut.remove(ob, False)
+		for me in meshes:
+			if not me.users:
+				ut.remove(me)
+				
+	def add_sections(self, bm, ids):
+		
+		# creates the sections of the cells of ids from the faces of the bisected bmesh bm, faces of other cells are ignored
+		
+		ids_set = set(ids)
+		cells = {}
+		for face in bm.faces:
+			id = self.get_section_id(face.calc_center_median())
+			if id not in ids_set:
+				continue
+			if id not in cells:
+				cells[id] = []
+			cells[id].append(face)
+			
+		materials = list(self.base.data.materials)
+		
+		for id, faces in cells.items():
+			self.hashes[id] = ut.get_faces_hash(bm, faces)
+			
+			# keep the objects of unchanged cells, remove those of changed cells
+			
+			objects = self.previous_sections.pop(id, None)
+			if objects:
+				sect = self.scene.objects.get(self.sections.name + SECT + id)
+				if sect and self.hashes_previous.get(id) == self.hashes[id]:
+					self.reused[id] = sect
+					continue
+				self.remove_section_objects(objects)
+				
+		for id in ids:
+			
+			if id not in cells or id in self.reused:
+				continue
+				
+			v = self.points[id]
+			sect_name = self.sections.name + SECT + id
+			
+			key = None
+			arrays = None
+			if self.cache:
+				key = "sect_" + self.cache.get_key(self.hashes[id], list(v))
+				arrays = self.cache.get(key)
+				
+			if arrays is not None:
+				sect = ut.new_object(self.scene, sect_name, arrays, materials, BOUNDS)
+			else:
+				bm_sect = ut.copy_faces(bm, cells[id])
+				
+				bmesh.ops.remove_doubles(bm_sect, verts=bm_sect.verts, dist=0.0001)
+				bmesh.ops.triangulate(bm_sect, faces=bm_sect.faces)
+				bmesh.ops.beautify_fill(bm_sect, faces=bm_sect.faces, edges=bm_sect.edges)
+				bmesh.ops.translate(bm_sect, verts=bm_sect.verts, vec=-v)
+				
+				deform = bm_sect.verts.layers.deform.verify()
+				bounds = {vert for e in bm_sect.edges if e.is_boundary for vert in e.verts}
+				for vert in bm_sect.verts:
+					vert[deform].clear()
+					if vert in bounds:
+						vert[deform][0] = 1.0
+						
+				sect_me = bpy.data.meshes.new(sect_name)
+				bm_sect.to_mesh(sect_me)
+				bm_sect.free()
+				for mat in materials:
+					sect_me.materials.append(mat)
+					
+				if self.cache:
+					self.cache.set(key, ut.get_mesh_arrays(sect_me, 0))
+					
+				sect = bpy.data.objects.new(sect_name, sect_me)
+				sect.vertex_groups.new(BOUNDS)
+				self.scene.objects.link(sect)
+				
+			sect.show_all_edges = True
+			sect.show_wire = True
+			sect.game.physics_type = "NO_COLLISION"
+			sect.location = v
+			sect.parent = self.sections
+			
+			self.data[id] = sect
+			self.cache_keys[sect.name] = key
+			
+	def generate_lod(self):
+		
+		if not self.prop_use_lod:
+			return
+			
+		lod = {id: [sect] for id, sect in self.data.items()}
+		id = ut.get_id(0, "", self.ndigits)
+		lod_id = ut.get_id(self.prop_lod_number, "_", 1)
+		me_name = self.sections.name + SECT + id + LOD + lod_id
+		sect_lod_me_linked = bpy.data.meshes.get(me_name) or bpy.data.meshes.new(me_name)
+		
+		use_quadric = self.prop_lod_backend == "use_quadric_decimator"
+		decimated = {}
+		keys = {}
+		
+		if self.cache:
+			for id, sect in self.data.items():
+				for i in range(1, self.prop_lod_number):
+					keys[id, i] = "lod_" + self.cache.get_key(self.cache_keys[sect.name], self.prop_lod_backend, self.prop_lod_factor / i)
+					arrays = self.cache.get(keys[id, i])
+					if arrays is not None:
+						decimated[id, i] = arrays
+						
+		if self.prop_lod_use_workers or use_quadric:
+			
+			jobs = []
+			for id, sect in self.data.items():
+				if all((id, i) in decimated for i in range(1, self.prop_lod_number)):
+					continue
+				arrays = ut.get_mesh_arrays(sect.data, sect.vertex_groups[BOUNDS].index)
+				for i in range(1, self.prop_lod_number):
+					if (id, i) not in decimated:
+						jobs.append(((id, i), (arrays, self.prop_lod_factor / i)))
+						
+			if self.prop_lod_use_workers:
+				print(self.prof.timed("Decimating LOD in worker processes"))
+				results = ut.decimate_in_workers([job for key, job in jobs], self.prop_lod_num_workers, use_quadric)
+			else:
+				print(self.prof.timed("Decimating LOD"))
+				results = [(dc.decimate_arrays(arrays, ratio), None) for key, (arrays, ratio) in jobs]
+				
+			for (key, job), (arrays, error) in zip(jobs, results):
+				if arrays is None:
+					print("Warning: decimation of", self.data[key[0]].name, "LOD", key[1], "failed in worker, decimating in place:", error)
+					continue
+				decimated[key] = arrays
+				if self.cache:
+					self.cache.set(keys[key], arrays)
+					
+		for i in range(1, self.prop_lod_number + 1):
+			
+			print(self.prof.timed("Generating LOD ", i, " of ", self.prop_lod_number))
+			
+			lod_id = ut.get_id(i, "_", 1)
+			
+			for id, sect in self.data.items():
+				sect_lod_name = sect.name + LOD + lod_id
+				sect_lod_me_name = sect.data.name + LOD + lod_id
+				
+				if i == self.prop_lod_number:
+					sect_lod = bpy.data.objects.new(sect_lod_name, sect_lod_me_linked)
+					sect_lod.game.physics_type = "NO_COLLISION"
+					self.scene.objects.link(sect_lod)
+				elif (id, i) in decimated:
+					sect_lod = ut.new_object(self.scene, sect_lod_name, decimated[id, i], sect.data.materials, BOUNDS)
+					sect_lod.data.name = sect_lod_me_name
+					sect_lod.show_all_edges = sect.show_all_edges
+					sect_lod.show_wire = sect.show_wire
+					sect_lod.game.physics_type = "NO_COLLISION"
+				else:
+					self.scene.objects.active = sect
+					sect.select = True
+					bpy.ops.object.duplicate()
+					sect.select = False
+					
+					sect_lod = self.scene.objects.active
+					sect_lod.name = sect_lod_name
+					sect_lod.data.name = sect_lod_me_name
+					
+					mod_decimate_collapse = sect_lod.modifiers.new("Decimate Collapse", "DECIMATE")
+					mod_decimate_collapse.decimate_type = "COLLAPSE"
+					mod_decimate_collapse.ratio = self.prop_lod_factor / i
+					mod_decimate_collapse.vertex_group = BOUNDS
+					mod_decimate_collapse.invert_vertex_group = True
+					#mod_decimate_collapse.use_collapse_triangulate = True
+					bpy.ops.object.modifier_apply(apply_as="DATA", modifier="Decimate Collapse")
+					
+					if self.cache:
+						self.cache.set(keys[id, i], ut.get_mesh_arrays(sect_lod.data, sect_lod.vertex_groups[BOUNDS].index))
+						
+				self.cache_keys[sect_lod.name] = keys.get((id, i))
+				sect_lod.location = sect.location
+				sect_lod.select = False
+				sect_lod.parent = self.sections
+				
+				lod[id].append(sect_lod)
+				
+		print(self.prof.timed("Configuring LOD"))
+		
+		lod_dist = self.lod_distance
+		
+		for id, l in lod.items():
+			sect = self.data[id]
+			self.scene.objects.active = sect
+			sect.select = True
+			for i, sect_lod in enumerate(l):
+				bpy.ops.object.lod_add()
+				lod_level = sect.lod_levels[i + 1]
+				lod_level.distance = lod_dist * i
+				lod_level.use_material = True
+				lod_level.object = sect_lod
+			sect.select = False
+			
+	def convert_particles(self):
+		
+		particles = {}
+		
+		for mod in self.object.modifiers:
+			if mod.type == "PARTICLE_SYSTEM":
+				
+				if not mod.show_viewport:
+					continue
+					
+				settings = mod.particle_system.settings
+				
+				if not settings.dupli_object:
+					continue
+					
+				print(self.prof.timed("Converting ", mod.name))
+				
+				self.materials.update(settings.dupli_object.data.materials)
+				
+				self.scene.objects.active = self.object
+				self.object.select = True
+				bpy.ops.object.duplicates_make_real()
+				self.object.select = False
+				bpy.ops.object.make_single_user(type="SELECTED_OBJECTS", obdata=True)
+				
+				transform_inverted = self.transform.inverted()
+				for ob in self.context.selected_objects:
+					ob.matrix_world = transform_inverted * ob.matrix_world
+					
+					id = self.get_section_id(ob.location)
+					
+					if id is None:
+						ut.remove(ob)
+						continue
+						
+					if id not in particles:
+						particles[id] = []
+					particles[id].append(ob)
+					
+				bpy.ops.object.select_all(action="DESELECT")
+				mod.show_viewport = True
+				
+		for id, objects in particles.items():
+			self.particles[id] = p = objects[0]
+			p.data.name = p.name = self.sections.name + PART + id
+			
+			if not objects:
+				continue
+				
+			if len(objects) > 1:
+				self.scene.objects.active = p
+				meshes = []
+				for ob in objects:
+					ob.select = True
+					if ob == p:
+						continue
+					meshes.append(ob.data)
+				bpy.ops.object.join()
+				p.select = False
+				for me in meshes:
+					ut.remove(me)
+					
+	def join_particles(self):
+		
+		if not self.particles:
+			return
+			
+		for id, sect in self.data.items():
+			
+			if id not in self.particles:
+				continue
+				
+			v = self.points[id]
+			part = self.particles[id]
+			part_me = part.data
+			
+			if self.prop_use_lod:
+				
+				lod = [ll.object for ll in sect.lod_levels[2:-1]]
+				
+				if self.prop_lod_backend == "use_quadric_decimator":
+					part_arrays = ut.get_mesh_arrays(part_me)
+					
+				for i, sect_lod in enumerate(lod):
+					
+					if self.prop_lod_backend == "use_quadric_decimator":
+						part_lod_arrays = dc.decimate_arrays(part_arrays, self.prop_lod_factor / (i + 1))
+						part_lod = ut.new_object(self.scene, part.name + LOD, part_lod_arrays, part_me.materials)
+						part_lod.matrix_world = part.matrix_world
+						part_lod.select = True
+						part_lod_me = part_lod.data
+					else:
+						self.scene.objects.active = part
+						part.select = True
+						bpy.ops.object.duplicate()
+						part.select = False
+						part_lod = self.scene.objects.active
+						part_lod_me = part_lod.data
+						
+						mod_decimate_collapse = part_lod.modifiers.new("Decimate Collapse", "DECIMATE")
+						mod_decimate_collapse.decimate_type = "COLLAPSE"
+						mod_decimate_collapse.ratio = self.prop_lod_factor / (i + 1)
+						mod_decimate_collapse.use_collapse_triangulate = True
+						bpy.ops.object.modifier_apply(apply_as="DATA", modifier="Decimate Collapse")
+						
+					self.scene.objects.active = sect_lod
+					sect_lod.select = True
+					bpy.ops.object.join()
+					self.scene.cursor_location = v
+					bpy.ops.object.origin_set(type="ORIGIN_CURSOR")
+					sect_lod.select = False
+					
+					ut.remove(part_lod_me)
+					
+			self.scene.objects.active = sect
+			sect.select = True
+			part.select = True
+			bpy.ops.object.join()
+			self.scene.cursor_location = v
+			bpy.ops.object.origin_set(type="ORIGIN_CURSOR")
+			sect.select = False
+			
+			ut.remove(part_me)
+			
+	def get_normals_objects(self):
+		
+		# returns the sections whose custom normals are copied and exported, with their lod levels
+		
+		objects = []
+		for sect in list(self.data.values()) + list(self.renormals.values()):
+			objects.append(sect)
+			if not self.prop_use_lod:
+				continue
+			for lod_level in sect.lod_levels[2:-1]:
+				objects.append(lod_level.object)
+		return objects
+		
+	def copy_normals(self):
+		
+		objects = self.get_normals_objects()
+		
+		# the bounds group of reused sections was removed by the export, it holds the vertices on their open edges
+		
+		renormals = {sect.name for sect in self.renormals.values()}
+		for ob in objects:
+			i = ob.name.rfind(LOD)
+			if (ob.name[:i] if i != -1 else ob.name) in renormals and BOUNDS not in ob.vertex_groups:
+				ut.add_boundary_group(ob, BOUNDS)
+				
+		for ob in objects:
+			
+			# custom normals are only cached without particles, which are joined after the lod levels
+			
+			key = None
+			if self.cache and self.cache_keys.get(ob.name) and not self.particles:
+				key = "normals_" + self.cache.get_key(self.base_key, self.cache_keys[ob.name])
+				arrays = self.cache.get(key)
+				if arrays is not None:
+					ob.data.use_auto_smooth = True
+					ob.data.create_normals_split()
+					ob.data.normals_split_custom_set(arrays["normals"].tolist())
+					continue
+					
+			self.scene.objects.active = ob
+			ob.select = True
+			
+			ob.data.use_auto_smooth = True
+			ob.data.create_normals_split()
+			
+			mod_copy_cust_norm = ob.modifiers.new(name="Copy Custom Normals", type="DATA_TRANSFER")
+			mod_copy_cust_norm.object = self.base
+			mod_copy_cust_norm.use_loop_data = True
+			mod_copy_cust_norm.data_types_loops = {"CUSTOM_NORMAL"}
+			mod_copy_cust_norm.vertex_group = BOUNDS
+			
+			bpy.ops.object.modifier_apply(apply_as="DATA", modifier="Copy Custom Normals")
+			
+			if key:
+				normals = numpy.empty(len(ob.data.loops) * 3, dtype=numpy.float32)
+				ob.data.calc_normals_split()
+				ob.data.loops.foreach_get("normal", normals)
+				self.cache.set(key, {"normals": normals.reshape(-1, 3)})
+				
+			ob.select = False
+			
+		ut.remove(self.base)
+		
+	def generate_lod_materials(self):
+		
+		if not self.prop_use_lod:
+			return
+			
+		print(self.prof.timed("Generating lod materials"))
+		
+		materials_lod = {}
+		
+		for mat in self.materials:
+			mat_lod = bpy.data.materials.get(self.prefix + mat.name)
+			if not mat_lod:
+				mat_lod = mat.copy()
+				mat_lod.name = self.prefix + mat.name
+			materials_lod[mat.name] = mat_lod
+			
+			mat_lod.game_settings.physics = False
+			mat_lod.use_cast_shadows = False
+			mat_lod.use_shadows = False
+			
+			mat.game_settings.physics = True
+			mat.use_cast_shadows = True
+			mat.use_shadows = True
+			
+		for sect in self.data.values():
+			for lod_level in sect.lod_levels[2:-1]:
+				sect_lod = lod_level.object
+				for i, mat in enumerate(sect_lod.data.materials):
+					sect_lod.active_material_index = i
+					sect_lod.active_material = materials_lod[mat.name]
+					
+	def export_normals(self):
+		
+		print(self.prof.timed("Exporting custom normals"))
+		
+		objects = self.get_normals_objects()
+		
+		approx_ndigits = self.prop_approx_num_digits if self.prop_use_approx else -1
+		
+		custom_normals = OrderedDict()
+		
+		if self.reused:
+			reused = {sect.name for id, sect in self.reused.items() if id not in self.renormals}
+			for name, ob_normals in self.normals_previous.items():
+				i = name.rfind(LOD)
+				if (name[:i] if i != -1 else name) in reused:
+					custom_normals[name] = ob_normals
+					
+		for ob in objects:
+			self.scene.objects.active = ob
+			ob.select = True
+			
+			bpy.ops.object.editmode_toggle()
+			bpy.ops.mesh.select_all(action="DESELECT")
+			bpy.ops.object.vertex_group_select()
+			bpy.ops.object.editmode_toggle()
+			
+			custom_normals[ob.name] = ut.get_custom_normals_arrays(ob, approx_ndigits, True)
+			
+			bpy.ops.object.editmode_toggle()
+			bpy.ops.mesh.select_all(action="DESELECT")
+			bpy.ops.object.editmode_toggle()
+			
+			ob.vertex_groups.remove(ob.vertex_groups.get(BOUNDS))
+			
+			ob.select = False
+			
+		ut.save_normals(custom_normals, PROP, self.object.name)
+		
+	def generate_physics(self):
+		
+		if not (self.prop_use_lod and self.prop_lod_use_physics):
+			return
+			
+		print(self.prof.timed("Generating Physics"))
+		
+		if self.prop_lod_physics_mode == "use_full_mesh":
+			physics = []
+			for sect in self.data.values():
+				sect_physics = ut.copy(self.scene, sect, True)
+				sect_physics.name = sect.name + PHYS
+				sect_physics.game.collision_bounds_type = "TRIANGLE_MESH"
+				physics.append(sect_physics)
+		else:
+			physics = self.add_collision_meshes()
+			
+		for sect_physics in physics:
+			sect_physics.game.physics_type = "STATIC"
+			sect_physics.game.use_collision_bounds = True
+			sect_physics.select = False
+			
+			sect_physics.parent = self.sections
+			
+		if self.physics_report:
+			num_tris = sum(entry["triangles"] for entry in self.physics_report.values())
+			num_tris_physics = sum(entry["physics_triangles"] for entry in self.physics_report.values())
+			print(self.prof.timed("Reduced physics from ", num_tris, " to ", num_tris_physics, " triangles"))
+			
+	def add_collision_meshes(self):
+		
+		# returns physics objects with decimated copies of the meshes of the sections, decimated like the lod
+		# the borders of the sections are locked, so the seams of neighbouring sections keep matching
+		
+		use_quadric = self.prop_lod_backend == "use_quadric_decimator"
+		
+		jobs = []
+		for sect in self.data.values():
+			arrays = ut.get_mesh_arrays(sect.data)
+			tri_loops, tri_poly = dc.triangulate_arrays(arrays)
+			num_tris = len(tri_loops)
+			arrays["bounds"] = dc.get_boundary(arrays["loop_vert"][tri_loops], len(arrays["co"]))
+			for name in ("uv_names", "uvs", "color_names", "colors", "edge_verts", "edge_sharp", "edge_seam", "edge_crease", "edge_bevel_weight"):
+				arrays[name] = arrays[name][:0]
+				
+			if self.prop_lod_physics_num_tris:
+				ratio = min(self.prop_lod_physics_num_tris / max(num_tris, 1), 1.0)
+			else:
+				ratio = self.prop_lod_physics_ratio
+				
+			jobs.append((sect, num_tris, (arrays, ratio)))
+			
+		if self.prop_lod_use_workers:
+			print(self.prof.timed("Decimating physics in worker processes"))
+			results = ut.decimate_in_workers([job for sect, num_tris, job in jobs], self.prop_lod_num_workers, use_quadric, False)
+		elif use_quadric:
+			results = [(dc.decimate_arrays(arrays, ratio, False), None) for sect, num_tris, (arrays, ratio) in jobs]
+		else:
+			results = [(None, None) for job in jobs]
+			
+		physics = []
+		for (sect, num_tris, (arrays, ratio)), (arrays_physics, error) in zip(jobs, results):
+			
+			if arrays_physics is None:
+				if error:
+					print("Warning: decimation of", sect.name + PHYS, "failed in worker, decimating in place:", error)
+					
+				sect_physics = ut.new_object(self.scene, sect.name + PHYS, arrays, sect.data.materials, BOUNDS)
+				self.scene.objects.active = sect_physics
+				sect_physics.select = True
+				
+				mod_decimate_collapse = sect_physics.modifiers.new("Decimate Collapse", "DECIMATE")
+				mod_decimate_collapse.decimate_type = "COLLAPSE"
+				mod_decimate_collapse.ratio = ratio
+				mod_decimate_collapse.vertex_group = BOUNDS
+				mod_decimate_collapse.invert_vertex_group = True
+				bpy.ops.object.modifier_apply(apply_as="DATA", modifier="Decimate Collapse")
+				
+				arrays_physics = ut.get_mesh_arrays(sect_physics.data)
+			else:
+				sect_physics = ut.new_object(self.scene, sect.name + PHYS, arrays_physics, sect.data.materials)
+				
+			sect_physics.location = sect.location
+			num_tris_physics = len(dc.triangulate_arrays(arrays_physics)[0])
+			
+			co = arrays_physics["co"]
+			is_flat = len(co) and co[:, 2].max() - co[:, 2].min() <= self.prop_lod_physics_flat_tolerance
+			
+			if is_flat and self.prop_lod_physics_flat_bounds == "use_box":
+				sect_physics.game.collision_bounds_type = "BOX"
+			elif is_flat and self.prop_lod_physics_flat_bounds == "use_convex_hull":
+				sect_physics.game.collision_bounds_type = "CONVEX_HULL"
+			else:
+				sect_physics.game.collision_bounds_type = "TRIANGLE_MESH"
+				
+			self.physics_report[sect.name] = OrderedDict([
+				("triangles", num_tris),
+				("physics_triangles", num_tris_physics),
+				("bounds", sect_physics.game.collision_bounds_type)
+			])
+			
+			physics.append(sect_physics)
+			
+		return physics
+		
+	def finalize(self):
+		
+		print(self.prof.timed("Finalizing sections"))
+		
+		layer_twenty = [False for i in range(19)] + [True]
+		
+		self.data.update(self.reused)
+		
+		sections = self.data.values()
+		for ob in self.sections.children:
+			ob.layers = layer_twenty
+			if ob not in sections:
+				ob.hide_render = True
+				ob.hide = True
+				
+		self.sections.layers = layer_twenty
+		self.sections.hide_render = True
+		self.sections.hide = True
+		
+		self.sections[PROP_HASHES] = self.hashes
+		self.sections[PROP_SETTINGS] = self.settings
+		self.sections[PROP_ORIGIN] = list(self.transform.translation)
+		
+	def generate_game_logic(self):
+		
+		print(self.prof.timed("Generating game logic"))
+		
+		self.scene.objects.active = self.object
+		self.object.select = True
+		
+		if PROP not in self.object:
+			bpy.ops.object.game_property_new(type="STRING", name=PROP)
+		else:
+			self.object[PROP].type = "STRING"
+		self.object.game.properties[PROP].value = self.sections.name
+		
+		# without a custom distance sections are streamed up to the distance at which the last lod level is empty
+		
+		stream_distance = 0.0
+		if self.prop_use_runtime_streaming:
+			stream_distance = self.prop_runtime_streaming_distance or self.lod_distance * self.prop_lod_number + self.size.length
+			
+		game_properties = (
+			(PROP_BUDGET, "INT", self.prop_lazy_normals_budget if self.prop_use_lazy_normals else 0),
+			(PROP_POOL, "INT", self.prop_lod_physics_pool_size),
+			(PROP_HYSTERESIS, "INT", self.prop_lod_physics_hysteresis),
+			(PROP_STREAM_DISTANCE, "FLOAT", stream_distance),
+			(PROP_STREAM_OBJECTS, "INT", self.prop_runtime_streaming_objects),
+			(PROP_STREAM_TIME, "FLOAT", self.prop_runtime_streaming_time)
+		)
+		
+		for prop_name, prop_type, value in game_properties:
+			if prop_name not in self.object.game.properties:
+				bpy.ops.object.game_property_new(type=prop_type, name=prop_name)
+			self.object.game.properties[prop_name].value = value
+		
+		ut.add_text(TEXT, True, SCRIPT)
+		ut.add_logic_python(self.object, SCRIPT, "update", True)
+		
+	def restore_initial_state(self):
+		
+		print(self.prof.timed("Restoring initial state"))
+		
+		self.object.hide_render = self.hide_render
+		self.object.hide = self.hide
+		
+		self.scene.cursor_location = self.cursor_location
+		
+		self.context.user_preferences.edit.use_global_undo = self.undo
+		
+	def log(self):
+		
+		self.log_msg = self.prof.timed("Finished generating ", len(self.data), " (", round(self.size.x, 1), " X ", round(self.size.y, 1), ") sections in")
+		
+		print(self.log_msg)
+		
+		if self.cache:
+			self.cache.evict()
+			print("Cache:", self.cache.hits, "hits,", self.cache.misses, "misses")
+			
+	def get_counts(self):
+		
+		objects = [ob for ob in self.sections.children if ob.type == "MESH"] if self.sections else []
+		
+		return OrderedDict([
+			("objects", len(objects)),
+			("vertices", sum(len(ob.data.vertices) for ob in objects)),
+			("faces", sum(len(ob.data.polygons) for ob in objects))
+		])
+		
+	def save_profile(self):
+		
+		report = self.prof.get_report(
+			blend=bpy.data.filepath, object=self.object.name, sections=len(self.data),
+			number=list(self.number), size=list(self.size), settings=self.settings, physics=self.physics_report
+		)
+		
+		ut.save_json(report, PROP, self.object.name + PROFILE)
+		if self.prop_use_profile_history:
+			ut.append_json(report, PROP, self.object.name + PROFILE)
+			
\ No newline at end of file
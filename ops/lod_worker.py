@@ -0,0 +1,67 @@
+import bpy, os, sys, json, traceback, importlib.util
+
+# decimates meshes in a background Blender process started by utils.decimate_in_workers
+# usage: blender --background --factory-startup --python lod_worker.py -- jobs.json
+
+def load_module(name):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(os.path.dirname(__file__), name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+ut = load_module("utils")
+dc = load_module("decimate")
+
+BOUNDS = "_BOUNDS"
+
+def decimate(scene, arrays, ratio):
+	me = bpy.data.meshes.new("LOD")
+	ut.set_mesh_arrays(me, arrays)
+	
+	num_materials = int(arrays["material_index"].max()) + 1 if len(arrays["material_index"]) else 0
+	for i in range(num_materials):
+		me.materials.append(None)
+		
+	ob = bpy.data.objects.new("LOD", me)
+	scene.objects.link(ob)
+	
+	vertex_group = ob.vertex_groups.new(BOUNDS)
+	vertex_group.add(arrays["bounds"].nonzero()[0].tolist(), 1.0, "REPLACE")
+	
+	mod_decimate_collapse = ob.modifiers.new("Decimate Collapse", "DECIMATE")
+	mod_decimate_collapse.decimate_type = "COLLAPSE"
+	mod_decimate_collapse.ratio = ratio
+	mod_decimate_collapse.vertex_group = BOUNDS
+	mod_decimate_collapse.invert_vertex_group = True
+	
+	me_lod = ob.to_mesh(scene, True, "PREVIEW")
+	arrays_lod = ut.get_mesh_arrays(me_lod, 0)
+	
+	ut.remove(ob)
+	ut.remove(me_lod)
+	
+	return arrays_lod
+	
+def main():
+	jobs_path = sys.argv[sys.argv.index("--") + 1]
+	with open(jobs_path) as f:
+		jobs = json.load(f)
+		
+	scene = bpy.context.scene
+	
+	for job in jobs:
+		try:
+			arrays = ut.load_mesh_arrays(job["input"])
+			if job["use_quadric"]:
+				arrays_lod = dc.decimate_arrays(arrays, job["ratio"], job["lock_attributes"])
+			else:
+				arrays_lod = decimate(scene, arrays, job["ratio"])
+			ut.save_mesh_arrays(arrays_lod, job["output"])
+		except Exception:
+			
+			# the error is written next to the output, where the add-on reports it for this job
+			
+			with open(job["error"], "w") as f:
+				f.write(traceback.format_exc())
+			
+main()
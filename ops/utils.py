@@ -1,22 +1,56 @@
-import bpy, os, time, numpy, pickle
+import bpy, bmesh, os, sys, time, math, bisect, hashlib, numpy, pickle, struct, json, shutil, subprocess, tempfile
 from mathutils import Vector
 from collections import OrderedDict
 
+try:
+	import resource
+except ImportError:
+	resource = None
+
 # path constants
 
 ADDONS_PATHS = bpy.utils.script_paths("addons")
 GEN_PATH = os.path.join("bge-tools", "gen")
 BGE_TOOLS_OT = "BGE_TOOLS_OT_"
+LOD_WORKER_PATH = os.path.join(os.path.dirname(__file__), "lod_worker.py")
+
+# worker constants
+
+WORKER_JOB_TIMEOUT = 600
+
+# custom normals file constants
+
+NORMALS_EXT = ".bin"
+NORMALS_MAGIC = b"BGTN"
+NORMALS_VERSION = 2
+NORMALS_HEADER = struct.Struct("<4sHHQ")
+NORMALS_ENTRY = struct.Struct("<64sQII")
+
+# cache constants
+
+CACHE_VERSION = 2
+CACHE_EXT = ".npz"
 
 # profiling utils
 
+def get_peak_memory():
+	
+	# returns the peak resident memory of this process in MB, None where it is not available
+	
+	if resource is None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+	
 class Profiler:
 	
 	def __init__(self):
-		self.start = time.clock()
+		self.start = time.perf_counter()
+		self.start_cpu = time.process_time()
+		self.stages = []
 		
 	def time(self):
-		return round(time.clock() - self.start, 1)
+		return round(time.perf_counter() - self.start, 1)
 		
 	def timed(self, *args):
 		s = ""
@@ -27,6 +61,37 @@ class Profiler:
 		s += str(self.time()) + " s"
 		return s
 		
+	def measure(self, name, func, get_counts=None):
+		
+		# calls func and records its wall and cpu time, the peak memory and the counts returned by get_counts
+		# the peak memory of a process can not be reset, so the rise of the peak during the stage is recorded,
+		# a stage that stays below the peak of an earlier stage records no rise
+		
+		start = time.perf_counter()
+		start_cpu = time.process_time()
+		start_peak = get_peak_memory()
+		result = func()
+		stage = OrderedDict()
+		stage["name"] = name
+		stage["wall"] = time.perf_counter() - start
+		stage["cpu"] = time.process_time() - start_cpu
+		stage["peak_memory"] = get_peak_memory()
+		stage["peak_memory_rise"] = None if start_peak is None else round(stage["peak_memory"] - start_peak, 1)
+		if get_counts:
+			stage.update(get_counts())
+		self.stages.append(stage)
+		return result
+		
+	def get_report(self, **info):
+		report = OrderedDict(sorted(info.items()))
+		report["time"] = time.time()
+		report["wall"] = time.perf_counter() - self.start
+		report["cpu"] = time.process_time() - self.start_cpu
+		report["peak_memory"] = get_peak_memory()
+		report["peak_memory_note"] = "peak resident memory of the process in MB since it started, per stage the rise of that peak during the stage"
+		report["stages"] = self.stages
+		return report
+		
 # string utils
 
 def get_id(o, suffix=".", num_digits=4):
@@ -50,6 +115,196 @@ def get_id(o, suffix=".", num_digits=4):
 		
 	return s
 	
+# hash utils
+
+def get_hash(data):
+	return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+	
+def get_arrays_hash(arrays):
+	h = hashlib.sha1()
+	for key in sorted(arrays):
+		h.update(key.encode("utf-8"))
+		h.update(numpy.ascontiguousarray(arrays[key]).tobytes())
+	return h.hexdigest()
+	
+def get_rna_values(rna):
+	
+	# returns the values of the properties of rna as strings, pointers by name, collections are skipped
+	
+	values = {}
+	for prop in rna.bl_rna.properties:
+		if prop.identifier == "rna_type" or prop.type == "COLLECTION":
+			continue
+		value = getattr(rna, prop.identifier, None)
+		if prop.type == "POINTER":
+			value = getattr(value, "name", None)
+		elif isinstance(value, set):
+			value = sorted(value)
+		elif hasattr(value, "__len__") and not isinstance(value, str):
+			value = list(value)
+		values[prop.identifier] = repr(value)
+	return values
+	
+def get_modifier_inputs(ob):
+	
+	# returns the values of the data blocks the modifiers of ob read, such as target objects and textures, None if one can not be hashed
+	# meshes are added by their arrays and images by their file, images edited but not saved can not be hashed
+	
+	blocks = OrderedDict()
+	
+	def add_blocks(rna, depth):
+		for prop in rna.bl_rna.properties:
+			if prop.type != "POINTER" or prop.identifier == "rna_type":
+				continue
+			value = getattr(rna, prop.identifier, None)
+			if not isinstance(value, bpy.types.ID):
+				continue
+			key = (type(value).__name__, value.name)
+			if key in blocks:
+				continue
+			blocks[key] = value
+			if depth:
+				add_blocks(value, depth - 1)
+				
+	for mod in ob.modifiers:
+		if mod.type != "PARTICLE_SYSTEM":
+			add_blocks(mod, 1)
+			
+	values = []
+	for key, block in blocks.items():
+		if isinstance(block, bpy.types.Image):
+			if block.is_dirty:
+				return None
+			file_path = bpy.path.abspath(block.filepath)
+			values.append([key, block.source, file_path, os.path.getmtime(file_path) if os.path.exists(file_path) else None])
+			continue
+		values.append([key, sorted(get_rna_values(block).items())])
+		if isinstance(block, bpy.types.Mesh):
+			values.append(get_arrays_hash(get_mesh_arrays(block)))
+	return values
+	
+def get_deform_arrays(ob):
+	
+	# returns the vertex group weights, shape keys and custom normals of the mesh of ob as arrays
+	# modifiers may depend on these, so they are part of what is hashed for the base
+	
+	me = ob.data
+	
+	group_vert = []
+	group_index = []
+	group_weight = []
+	for v in me.vertices:
+		for g in v.groups:
+			group_vert.append(v.index)
+			group_index.append(g.group)
+			group_weight.append(g.weight)
+			
+	arrays = {
+		"group_names": numpy.array([vertex_group.name for vertex_group in ob.vertex_groups], dtype=numpy.str_),
+		"group_vert": numpy.array(group_vert, dtype=numpy.int32),
+		"group_index": numpy.array(group_index, dtype=numpy.int32),
+		"group_weight": numpy.array(group_weight, dtype=numpy.float32)
+	}
+	
+	if me.shape_keys:
+		arrays["shape_keys"] = numpy.array([repr(sorted(get_rna_values(me.shape_keys).items()))], dtype=numpy.str_)
+		for i, key_block in enumerate(me.shape_keys.key_blocks):
+			co = numpy.empty(len(key_block.data) * 3, dtype=numpy.float32)
+			key_block.data.foreach_get("co", co)
+			arrays["shape_key_co_" + str(i)] = co
+			arrays["shape_key_values_" + str(i)] = numpy.array([repr(sorted(get_rna_values(key_block).items()))], dtype=numpy.str_)
+			
+	if me.has_custom_normals:
+		me.calc_normals_split()
+		normals = numpy.empty(len(me.loops) * 3, dtype=numpy.float32)
+		me.loops.foreach_get("normal", normals)
+		arrays["custom_normals"] = normals
+		
+	return arrays
+	
+def has_uncached_layers(me):
+	
+	# returns whether me has layers that mesh arrays do not hold
+	
+	for name in ("vertex_layers_float", "vertex_layers_int", "vertex_layers_string", "polygon_layers_float", "polygon_layers_int", "polygon_layers_string", "skin_vertices", "vertex_paint_masks"):
+		if len(getattr(me, name, ())):
+			return True
+	return False
+	
+def get_faces_hash(bm, faces):
+	
+	# hashes the coordinates, uv coordinates, vertex colors, materials, smoothing, edge flags, creases and bevel weights of faces
+	
+	uv_layers = list(bm.loops.layers.uv.values())
+	color_layers = list(bm.loops.layers.color.values())
+	vert_layers = list(bm.verts.layers.bevel_weight.values())
+	edge_layers = list(bm.edges.layers.crease.values()) + list(bm.edges.layers.bevel_weight.values())
+	data = []
+	for face in faces:
+		data += [face.material_index, face.smooth, len(face.loops)]
+		for loop in face.loops:
+			data += loop.vert.co
+			data += [loop.edge.smooth, loop.edge.seam]
+			for uv_layer in uv_layers:
+				data += loop[uv_layer].uv
+			for color_layer in color_layers:
+				data += loop[color_layer]
+			for vert_layer in vert_layers:
+				data.append(loop.vert[vert_layer])
+			for edge_layer in edge_layers:
+				data.append(loop.edge[edge_layer])
+	return hashlib.sha1(numpy.array(data, dtype=numpy.float64).tobytes()).hexdigest()
+	
+# cache utils
+
+class Cache:
+	
+	# stores mesh arrays per key as files in a directory
+	# reading an entry marks it as recently used, evict removes the least recently used entries above max_size
+	
+	def __init__(self, max_size, *args):
+		self.dir = os.path.join(bpy.path.abspath("//"), *args)
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+		
+	def get_key(self, *data):
+		return get_hash([CACHE_VERSION] + list(data))
+		
+	def get(self, key):
+		file_path = os.path.join(self.dir, key + CACHE_EXT)
+		try:
+			arrays = load_mesh_arrays(file_path)
+			os.utime(file_path, None)
+		except (OSError, ValueError):
+			self.misses += 1
+			return None
+		self.hits += 1
+		return arrays
+		
+	def set(self, key, arrays):
+		if not os.path.exists(self.dir):
+			os.makedirs(self.dir)
+		file_path = os.path.join(self.dir, key + CACHE_EXT)
+		save_mesh_arrays(arrays, file_path + ".tmp")
+		os.replace(file_path + ".tmp", file_path)
+		
+	def evict(self):
+		if not os.path.exists(self.dir):
+			return
+		entries = []
+		for name in os.listdir(self.dir):
+			file_path = os.path.join(self.dir, name)
+			stat = os.stat(file_path)
+			entries.append((stat.st_mtime, stat.st_size, file_path))
+		entries.sort()
+		size = sum(entry[1] for entry in entries)
+		for mtime, file_size, file_path in entries:
+			if size <= self.max_size:
+				break
+			os.remove(file_path)
+			size -= file_size
+			
 # math utils
 
 def get_sign(f):
@@ -60,6 +315,24 @@ def point_inside_rectangle(pnt, rect):
 	crn = Vector((cen.x - dim.x * 0.5, cen.y - dim.y * 0.5))
 	return (crn.x <= pnt.x <= crn.x + dim.x and crn.y <= pnt.y <= crn.y + dim.y)
 	
+def get_grid_index(pnt, number, size, factor=1.0):
+	
+	# returns the (x, y) index of the cell of a grid centered on the origin that contains pnt, None if outside
+	# cells are scaled by factor around their center
+	# a point on an edge shared by two cells belongs to the cell with the lowest index
+	
+	num_x = int(number[0])
+	num_y = int(number[1])
+	u = pnt[0] / size[0] + num_x * 0.5
+	v = pnt[1] / size[1] + num_y * 0.5
+	i = max(math.ceil(u) - 1, 0)
+	j = max(math.ceil(v) - 1, 0)
+	if i >= num_x or j >= num_y:
+		return None
+	if abs(u - i - 0.5) > factor * 0.5 or abs(v - j - 0.5) > factor * 0.5:
+		return None
+	return i, j
+	
 # text utils
 
 def add_text(name, intern=True, new_name="", ext=".py"):
@@ -124,6 +397,30 @@ def remove_logic_python(ob, brick_name):
 		if actu.name == brick_name:
 			bpy.ops.logic.controller_remove(actuator=brick_name, object=ob.name)
 			
+def new_object(sc, name, arrays, materials=(), group_name=""):
+	
+	# returns a new object with a new mesh made from arrays, the bounds of arrays are assigned to group_name
+	
+	me = bpy.data.meshes.new(name)
+	set_mesh_arrays(me, arrays)
+	for mat in materials:
+		me.materials.append(mat)
+	ob = bpy.data.objects.new(name, me)
+	if group_name:
+		ob.vertex_groups.new(group_name).add(arrays["bounds"].nonzero()[0].tolist(), 1.0, "REPLACE")
+	sc.objects.link(ob)
+	return ob
+	
+def add_boundary_group(ob, group_name):
+	
+	# assigns the vertices on edges used by one face only to a new vertex group group_name
+	
+	bm = bmesh.new()
+	bm.from_mesh(ob.data)
+	indices = [vert.index for vert in bm.verts if any(e.is_boundary for e in vert.link_edges)]
+	bm.free()
+	ob.vertex_groups.new(group_name).add(indices, 1.0, "REPLACE")
+	
 def copy(sc, ob, link=False, suffix="", apply_modifiers=False, modifier_settings="RENDER"):
 	if link:
 		ob_copy = bpy.data.objects.new(ob.name + suffix, ob.data)
@@ -163,39 +460,327 @@ def dimensions(*objects, include_transform=False):
 	dim_z = max(bb_crns[i][2] for i in range(n)) - min(bb_crns[i][2] for i in range(n))
 	return Vector((dim_x, dim_y, dim_z))
 	
-def get_custom_normals(ob, approx_ndigits=-1, from_selected=False):
+# mesh utils
+
+def bisect_grid(bm, number, size, margin=0.0001):
+	
+	# cuts bm along the lines of a grid centered on the origin and splits the cut edges
+	# faces are bucketed once per axis by the lines their bounds touch, so every cut only gets the faces on its line
+	# faces created by a cut are carried over to the next line of the same axis
+	
+	for axis in range(2):
+		num = int(number[axis])
+		lines = [(i - 0.5 * num) * size[axis] for i in range(num + 1)]
+		buckets = [[] for line in lines]
+		
+		for face in bm.faces:
+			coords = [v.co[axis] for v in face.verts]
+			first = bisect.bisect_left(lines, min(coords) - margin)
+			last = bisect.bisect_right(lines, max(coords) + margin)
+			for k in range(first, last):
+				buckets[k].append(face)
+				
+		plane_no = [0, 0, 0]
+		plane_no[axis] = 1
+		carry = []
+		
+		for k, line in enumerate(lines):
+			faces = OrderedDict.fromkeys(f for f in buckets[k] if f.is_valid)
+			for face in carry:
+				if face.is_valid:
+					coords = [v.co[axis] for v in face.verts]
+					if min(coords) - margin <= line <= max(coords) + margin:
+						faces[face] = None
+			buckets[k] = None
+			carry = []
+			
+			if not faces:
+				continue
+				
+			edges = OrderedDict.fromkeys(e for f in faces for e in f.edges)
+			verts = OrderedDict.fromkeys(v for f in faces for v in f.verts)
+			
+			plane_co = [0, 0, 0]
+			plane_co[axis] = line
+			
+			try:
+				d = bmesh.ops.bisect_plane(bm, geom=list(verts) + list(edges) + list(faces), plane_co=plane_co, plane_no=plane_no)
+				bmesh.ops.split_edges(bm, edges=[e for e in d["geom_cut"] if isinstance(e, bmesh.types.BMEdge)])
+			except RuntimeError:
+				continue
+				
+			for face in d["geom"]:
+				if isinstance(face, bmesh.types.BMFace) and face.is_valid:
+					if max(v.co[axis] for v in face.verts) > line + margin:
+						carry.append(face)
+						
+def copy_faces(bm, faces):
+	
+	# returns a new bmesh holding a copy of faces, including the custom data layers of bm
+	
+	bm_copy = bmesh.new()
+	for elem in ("verts", "edges", "faces", "loops"):
+		layers = getattr(bm, elem).layers
+		layers_copy = getattr(bm_copy, elem).layers
+		for layer_type in dir(layers):
+			collection = getattr(layers, layer_type)
+			if not isinstance(collection, bmesh.types.BMLayerCollection):
+				continue
+			for layer in collection:
+				getattr(layers_copy, layer_type).new(layer.name)
+				
+	edges = OrderedDict.fromkeys(e for f in faces for e in f.edges)
+	verts = OrderedDict.fromkeys(v for f in faces for v in f.verts)
+	bmesh.ops.duplicate(bm, geom=list(verts) + list(edges) + list(faces), dest=bm_copy)
+	
+	return bm_copy
+	
+def get_mesh_arrays(me, group_index=-1, with_normals=False):
+	
+	# returns the geometry, materials, smoothing, edge flags, uv maps and vertex colors of me as arrays
+	# bounds flags the vertices assigned to the vertex group at group_index
+	# with_normals adds the split normals of every loop
+	
+	num_verts = len(me.vertices)
+	num_edges = len(me.edges)
+	num_loops = len(me.loops)
+	num_polys = len(me.polygons)
+	
+	co = numpy.empty(num_verts * 3, dtype=numpy.float32)
+	me.vertices.foreach_get("co", co)
+	vert_bevel_weight = numpy.empty(num_verts, dtype=numpy.float32)
+	me.vertices.foreach_get("bevel_weight", vert_bevel_weight)
+	edge_verts = numpy.empty(num_edges * 2, dtype=numpy.int32)
+	me.edges.foreach_get("vertices", edge_verts)
+	edge_sharp = numpy.empty(num_edges, dtype=numpy.bool_)
+	me.edges.foreach_get("use_edge_sharp", edge_sharp)
+	edge_seam = numpy.empty(num_edges, dtype=numpy.bool_)
+	me.edges.foreach_get("use_seam", edge_seam)
+	edge_crease = numpy.empty(num_edges, dtype=numpy.float32)
+	me.edges.foreach_get("crease", edge_crease)
+	edge_bevel_weight = numpy.empty(num_edges, dtype=numpy.float32)
+	me.edges.foreach_get("bevel_weight", edge_bevel_weight)
+	loop_vert = numpy.empty(num_loops, dtype=numpy.int32)
+	me.loops.foreach_get("vertex_index", loop_vert)
+	loop_start = numpy.empty(num_polys, dtype=numpy.int32)
+	me.polygons.foreach_get("loop_start", loop_start)
+	loop_total = numpy.empty(num_polys, dtype=numpy.int32)
+	me.polygons.foreach_get("loop_total", loop_total)
+	material_index = numpy.empty(num_polys, dtype=numpy.int32)
+	me.polygons.foreach_get("material_index", material_index)
+	use_smooth = numpy.empty(num_polys, dtype=numpy.bool_)
+	me.polygons.foreach_get("use_smooth", use_smooth)
+	
+	uv_names = [uv_layer.name for uv_layer in me.uv_layers]
+	uvs = numpy.empty((len(uv_names), num_loops * 2), dtype=numpy.float32)
+	for i, uv_layer in enumerate(me.uv_layers):
+		uv_layer.data.foreach_get("uv", uvs[i])
+		
+	color_names = [color_layer.name for color_layer in me.vertex_colors]
+	colors = numpy.empty((len(color_names), num_loops * 3), dtype=numpy.float32)
+	for i, color_layer in enumerate(me.vertex_colors):
+		color_layer.data.foreach_get("color", colors[i])
+		
+	bounds = numpy.zeros(num_verts, dtype=numpy.bool_)
+	if group_index != -1:
+		for v in me.vertices:
+			for g in v.groups:
+				if g.group == group_index and g.weight > 0.5:
+					bounds[v.index] = True
+					
+	arrays = {
+		"co": co.reshape(num_verts, 3),
+		"vert_bevel_weight": vert_bevel_weight,
+		"edge_verts": edge_verts.reshape(num_edges, 2),
+		"edge_sharp": edge_sharp,
+		"edge_seam": edge_seam,
+		"edge_crease": edge_crease,
+		"edge_bevel_weight": edge_bevel_weight,
+		"loop_vert": loop_vert,
+		"loop_start": loop_start,
+		"loop_total": loop_total,
+		"material_index": material_index,
+		"use_smooth": use_smooth,
+		"uv_names": numpy.array(uv_names, dtype=numpy.str_),
+		"uvs": uvs.reshape(len(uv_names), num_loops, 2),
+		"color_names": numpy.array(color_names, dtype=numpy.str_),
+		"colors": colors.reshape(len(color_names), num_loops, 3),
+		"bounds": bounds,
+		"auto_smooth": numpy.array([me.use_auto_smooth, me.auto_smooth_angle], dtype=numpy.float32)
+	}
+	
+	if with_normals:
+		me.calc_normals_split()
+		normals = numpy.empty(num_loops * 3, dtype=numpy.float32)
+		me.loops.foreach_get("normal", normals)
+		arrays["normals"] = normals.reshape(num_loops, 3)
+		
+	return arrays
+	
+def get_polygons_arrays(arrays, mask):
+	
+	# returns the mesh arrays of the polygons of arrays flagged by mask, with their vertices, loops and edges only
+	
+	loop_start = arrays["loop_start"][mask]
+	loop_total = arrays["loop_total"][mask]
+	starts = numpy.cumsum(loop_total) - loop_total
+	offsets = numpy.arange(loop_total.sum()) - numpy.repeat(starts, loop_total)
+	loops = numpy.repeat(loop_start, loop_total) + offsets
+	
+	verts, loop_vert = numpy.unique(arrays["loop_vert"][loops], return_inverse=True)
+	vert_map = numpy.full(len(arrays["co"]), -1, dtype=numpy.int64)
+	vert_map[verts] = numpy.arange(len(verts))
+	
+	# the edges are those running from every loop to the next one of its polygon
+	
+	next_loops = numpy.arange(1, len(loops) + 1)
+	next_loops[starts + loop_total - 1] = starts
+	poly_edges = numpy.sort(numpy.stack((loop_vert, loop_vert[next_loops]), axis=1), axis=1)
+	edge_verts = vert_map[arrays["edge_verts"]]
+	edge_keys = numpy.sort(edge_verts, axis=1)
+	edges = (edge_keys[:, 0] >= 0) & numpy.isin(edge_keys[:, 0] * len(verts) + edge_keys[:, 1], poly_edges[:, 0] * len(verts) + poly_edges[:, 1])
+	
+	return {
+		"co": arrays["co"][verts],
+		"vert_bevel_weight": arrays["vert_bevel_weight"][verts],
+		"edge_verts": edge_verts[edges].astype(numpy.int32),
+		"edge_sharp": arrays["edge_sharp"][edges],
+		"edge_seam": arrays["edge_seam"][edges],
+		"edge_crease": arrays["edge_crease"][edges],
+		"edge_bevel_weight": arrays["edge_bevel_weight"][edges],
+		"loop_vert": loop_vert.astype(numpy.int32),
+		"loop_start": starts.astype(numpy.int32),
+		"loop_total": loop_total,
+		"material_index": arrays["material_index"][mask],
+		"use_smooth": arrays["use_smooth"][mask],
+		"uv_names": arrays["uv_names"],
+		"uvs": arrays["uvs"][:, loops],
+		"color_names": arrays["color_names"],
+		"colors": arrays["colors"][:, loops],
+		"bounds": arrays["bounds"][verts],
+		"auto_smooth": arrays["auto_smooth"]
+	}
+	
+def set_mesh_arrays(me, arrays):
+	
+	# fills the empty mesh me with arrays as returned by get_mesh_arrays
+	# the flagged edges are added before the edges of the polygons are calculated, which keeps their flags
+	# arrays without edge flags or vertex colors, as from older caches, are accepted
+	
+	me.vertices.add(len(arrays["co"]))
+	me.vertices.foreach_set("co", numpy.ravel(arrays["co"]))
+	if "vert_bevel_weight" in arrays:
+		me.vertices.foreach_set("bevel_weight", arrays["vert_bevel_weight"])
+		
+	if "edge_verts" in arrays:
+		flagged = arrays["edge_sharp"] | arrays["edge_seam"] | (arrays["edge_crease"] > 0) | (arrays["edge_bevel_weight"] > 0)
+		me.edges.add(int(flagged.sum()))
+		me.edges.foreach_set("vertices", numpy.ravel(arrays["edge_verts"][flagged]))
+		me.edges.foreach_set("use_edge_sharp", arrays["edge_sharp"][flagged])
+		me.edges.foreach_set("use_seam", arrays["edge_seam"][flagged])
+		me.edges.foreach_set("crease", arrays["edge_crease"][flagged])
+		me.edges.foreach_set("bevel_weight", arrays["edge_bevel_weight"][flagged])
+		
+	me.loops.add(len(arrays["loop_vert"]))
+	me.loops.foreach_set("vertex_index", arrays["loop_vert"])
+	me.polygons.add(len(arrays["loop_start"]))
+	me.polygons.foreach_set("loop_start", arrays["loop_start"])
+	me.polygons.foreach_set("loop_total", arrays["loop_total"])
+	me.polygons.foreach_set("material_index", arrays["material_index"])
+	me.polygons.foreach_set("use_smooth", arrays["use_smooth"])
+	
+	for name, uv in zip(arrays["uv_names"], arrays["uvs"]):
+		me.uv_textures.new(str(name))
+		me.uv_layers[str(name)].data.foreach_set("uv", numpy.ravel(uv))
+		
+	for name, color in zip(arrays.get("color_names", ()), arrays.get("colors", ())):
+		me.vertex_colors.new(str(name)).data.foreach_set("color", numpy.ravel(color))
+		
+	me.update(calc_edges=True)
 	
-	def triform(loop_indices):
-		indices = list(loop_indices)
-		if len(indices) < 4:
-			return indices
-		return [indices[i] for i in (0, 1, 2, 2, 3, 0)]
+	if "auto_smooth" in arrays:
+		me.use_auto_smooth = bool(arrays["auto_smooth"][0])
+		me.auto_smooth_angle = float(arrays["auto_smooth"][1])
+		
+	if "normals" in arrays:
+		me.use_auto_smooth = True
+		me.normals_split_custom_set(arrays["normals"].tolist())
 		
+def pack_keys(keys):
+	
+	# packs rounded xy coordinates into int64 grid cell keys
+	
+	keys = numpy.asarray(keys, dtype=numpy.int64).reshape(-1, 2)
+	return (keys[:, 0] << 32) | (keys[:, 1] & 0xFFFFFFFF)
+	
+def unpack_keys(packed):
+	packed = numpy.asarray(packed, dtype=numpy.int64)
+	return numpy.stack((packed >> 32, (packed & 0xFFFFFFFF).astype(numpy.uint32).view(numpy.int32)), axis=1)
+	
+def get_custom_normals_arrays(ob, approx_ndigits=-1, from_selected=False):
+	
+	# loops are visited per polygon in the order (0, 1, 2) for triangles and (0, 1, 2, 2, 3, 0) otherwise
+	# each loop writes the normal of its vertex under the rounded xy key, the last write wins
+	
 	mesh = ob.data
 	mesh.calc_normals_split()
 	
-	clnors = [0.0] * 3 * len(mesh.loops)
+	num_loops = len(mesh.loops)
+	num_verts = len(mesh.vertices)
+	num_polys = len(mesh.polygons)
+	
+	clnors = numpy.empty(num_loops * 3, dtype=numpy.float32)
 	mesh.loops.foreach_get("normal", clnors)
-	loop_vert = {l.index: l.vertex_index for l in mesh.loops}
+	clnors = clnors.reshape(num_loops, 3)
+	
+	loop_vert = numpy.empty(num_loops, dtype=numpy.int32)
+	mesh.loops.foreach_get("vertex_index", loop_vert)
+	
+	co = numpy.empty(num_verts * 3, dtype=numpy.float32)
+	mesh.vertices.foreach_get("co", co)
+	co = co.reshape(num_verts, 3)
+	
+	loop_start = numpy.empty(num_polys, dtype=numpy.int32)
+	loop_total = numpy.empty(num_polys, dtype=numpy.int32)
+	mesh.polygons.foreach_get("loop_start", loop_start)
+	mesh.polygons.foreach_get("loop_total", loop_total)
+	
+	triform = loop_total > 3
+	counts = numpy.where(triform, 6, loop_total)
+	offsets = numpy.cumsum(counts) - counts
 	
-	normals = {}
+	pos = numpy.arange(counts.sum()) - numpy.repeat(offsets, counts)
+	pos = numpy.where(numpy.repeat(triform, counts), numpy.array([0, 1, 2, 2, 3, 0])[pos % 6], pos)
+	loops = numpy.repeat(loop_start, counts) + pos
+	verts = loop_vert[loops]
 	
-	for poly in mesh.polygons:
+	if from_selected:
+		select = numpy.empty(num_verts, dtype=numpy.bool_)
+		mesh.vertices.foreach_get("select", select)
+		mask = select[verts]
+		loops = loops[mask]
+		verts = verts[mask]
 		
-		for li in triform(poly.loop_indices):
-			vert = mesh.vertices[loop_vert[li]]
-			
-			if from_selected and not vert.select:
-				continue
-				
-			vert_normal = [clnors[li*3], clnors[li*3+1], clnors[li*3+2]]
-			if approx_ndigits != -1:
-				vert_normal = [round(f, approx_ndigits) for f in vert_normal]
-				
-			id = str([round(f) for f in vert.co.xy])
-			normals[id] = vert_normal
-			
-	return normals
+	keys = numpy.rint(co[verts, :2]).astype(numpy.int64)
+	packed = pack_keys(keys)
+	
+	# first occurrence gives the insertion order, last occurrence gives the value
+	
+	unique, first = numpy.unique(packed, return_index=True)
+	unique_rev, last_rev = numpy.unique(packed[::-1], return_index=True)
+	last = len(packed) - 1 - last_rev
+	order = numpy.argsort(first)
+	
+	keys = keys[first[order]]
+	normals = clnors[loops[last[order]]]
+	if approx_ndigits != -1:
+		normals = numpy.array([[round(f, approx_ndigits) for f in n] for n in normals.tolist()], dtype=numpy.float64)
+		
+	return keys, normals
+	
+def get_custom_normals(ob, approx_ndigits=-1, from_selected=False):
+	keys, normals = get_custom_normals_arrays(ob, approx_ndigits, from_selected)
+	return {str(k): n for k, n in zip(keys.tolist(), normals.tolist())}
 	
 # file utils
 
@@ -215,4 +800,167 @@ def save_txt(data, *args):
 	file_path = os.path.join(dir, args[-1] + ".txt")
 	with open(file_path, "wb") as f:
 		pickle.dump(data, f)
-		
\ No newline at end of file
+		
+def save_json(data, *args):
+	dir = os.path.join(bpy.path.abspath("//"), *args[:-1])
+	if not os.path.exists(dir):
+		os.mkdir(dir)
+	file_path = os.path.join(dir, args[-1] + ".json")
+	with open(file_path, "w") as f:
+		json.dump(data, f, indent="\t")
+		
+def append_json(data, *args):
+	
+	# appends data as one line to a json lines file
+	
+	dir = os.path.join(bpy.path.abspath("//"), *args[:-1])
+	if not os.path.exists(dir):
+		os.mkdir(dir)
+	file_path = os.path.join(dir, args[-1] + ".jsonl")
+	with open(file_path, "a") as f:
+		f.write(json.dumps(data) + "\n")
+		
+def save_mesh_arrays(arrays, file_path):
+	with open(file_path, "wb") as f:
+		numpy.savez(f, **arrays)
+		
+def load_mesh_arrays(file_path):
+	with numpy.load(file_path) as npz:
+		return {key: npz[key] for key in npz.files}
+		
+def save_normals(data, *args):
+	
+	# data maps object names to (keys, normals) arrays
+	# the header and the section table are followed by the int64 grid cell keys and float32 normals of every object
+	# the data of every object starts at an 8 byte boundary
+	
+	dir = os.path.join(bpy.path.abspath("//"), *args[:-1])
+	if not os.path.exists(dir):
+		os.mkdir(dir)
+	file_path = os.path.join(dir, args[-1] + NORMALS_EXT)
+	
+	offset = NORMALS_HEADER.size + NORMALS_ENTRY.size * len(data)
+	entries = []
+	arrays = []
+	for ob_name, (keys, normals) in data.items():
+		name = ob_name.encode("utf-8")
+		if len(name) > 64:
+			raise ValueError(ob_name, "name too long for custom normals file")
+		keys = pack_keys(keys).astype("<i8")
+		normals = numpy.ascontiguousarray(normals, dtype="<f4")
+		count = len(keys)
+		padding = -(count * 20) % 8
+		entries.append(NORMALS_ENTRY.pack(name, offset, count, 0))
+		arrays += [keys, normals, numpy.zeros(padding, dtype=numpy.uint8)]
+		offset += count * 20 + padding
+		
+	with open(file_path, "wb") as f:
+		f.write(NORMALS_HEADER.pack(NORMALS_MAGIC, NORMALS_VERSION, 0, len(data)))
+		for entry in entries:
+			f.write(entry)
+		for array in arrays:
+			f.write(array.tobytes())
+			
+def load_normals(*args):
+	
+	# returns the (keys, normals) arrays per object of a custom normals file, None if there is no such file
+	
+	file_path = os.path.join(bpy.path.abspath("//"), *args[:-1])
+	file_path = os.path.join(file_path, args[-1] + NORMALS_EXT)
+	if not os.path.exists(file_path):
+		return None
+		
+	with open(file_path, "rb") as f:
+		buffer = f.read()
+		
+	magic, version, reserved, num_entries = NORMALS_HEADER.unpack_from(buffer, 0)
+	if magic != NORMALS_MAGIC or version != NORMALS_VERSION:
+		return None
+		
+	data = OrderedDict()
+	for i in range(num_entries):
+		name, offset, count, reserved = NORMALS_ENTRY.unpack_from(buffer, NORMALS_HEADER.size + NORMALS_ENTRY.size * i)
+		keys = numpy.frombuffer(buffer, dtype="<i8", count=count, offset=offset)
+		normals = numpy.frombuffer(buffer, dtype="<f4", count=count * 3, offset=offset + count * 8)
+		data[name.rstrip(b"\0").decode("utf-8")] = (unpack_keys(keys), normals.reshape(count, 3))
+	return data
+	
+def convert_txt(*args):
+	
+	# converts a pickled custom normals file to the binary format
+	
+	data = OrderedDict()
+	for ob_name, ob_normals in load_txt(*args).items():
+		keys = numpy.array([json.loads(id) for id in ob_normals], dtype=numpy.int64).reshape(-1, 2)
+		normals = numpy.array(list(ob_normals.values()), dtype=numpy.float32).reshape(-1, 3)
+		data[ob_name] = (keys, normals)
+	save_normals(data, *args)
+	return data
+	
+# process utils
+
+def decimate_in_workers(jobs, num_workers=0, use_quadric=False, lock_attributes=True, job_timeout=WORKER_JOB_TIMEOUT):
+	
+	# decimates meshes in background Blender processes, with the Decimate modifier or the quadric decimator
+	# lock_attributes is passed on to the quadric decimator
+	# jobs is a list of (arrays, ratio) tuples, the bounds of arrays are kept as they are
+	# a worker is killed once it runs longer than job_timeout seconds per job given to it
+	# returns an (arrays, error) tuple per job, arrays is None and error tells why for jobs that failed
+	
+	if not jobs:
+		return []
+		
+	num_workers = min(num_workers or os.cpu_count() or 1, len(jobs))
+	tmp_dir = tempfile.mkdtemp(prefix="bge_tools_lod_")
+	
+	try:
+		inputs = {}
+		worker_jobs = []
+		for i, (arrays, ratio) in enumerate(jobs):
+			if id(arrays) not in inputs:
+				inputs[id(arrays)] = input_path = os.path.join(tmp_dir, "input_" + str(len(inputs)) + ".npz")
+				save_mesh_arrays(arrays, input_path)
+			output_path = os.path.join(tmp_dir, "output_" + str(i) + ".npz")
+			error_path = os.path.join(tmp_dir, "error_" + str(i) + ".txt")
+			worker_jobs.append({"input": inputs[id(arrays)], "output": output_path, "error": error_path, "ratio": ratio, "use_quadric": use_quadric, "lock_attributes": lock_attributes})
+			
+		processes = []
+		for i in range(num_workers):
+			jobs_path = os.path.join(tmp_dir, "jobs_" + str(i) + ".json")
+			log_path = os.path.join(tmp_dir, "log_" + str(i) + ".txt")
+			with open(jobs_path, "w") as f:
+				json.dump(worker_jobs[i::num_workers], f)
+			args = [bpy.app.binary_path, "--background", "--factory-startup", "--python", LOD_WORKER_PATH, "--", jobs_path]
+			with open(log_path, "w") as log:
+				process = subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT)
+			processes.append((process, log_path, time.perf_counter() + job_timeout * len(worker_jobs[i::num_workers])))
+			
+		# the exit of a worker and the last line of its log are reported for each of its jobs without output or error
+		
+		worker_errors = []
+		for process, log_path, deadline in processes:
+			try:
+				process.wait(max(deadline - time.perf_counter(), 0))
+			except subprocess.TimeoutExpired:
+				process.kill()
+				process.wait()
+				worker_errors.append("Worker timed out after " + str(job_timeout) + " seconds per job")
+				continue
+			with open(log_path) as f:
+				log_tail = f.read().strip().splitlines()[-1:]
+			worker_errors.append(" ".join(["Worker exited with code " + str(process.returncode) + " without output"] + log_tail))
+				
+		results = []
+		for i, job in enumerate(worker_jobs):
+			if os.path.exists(job["output"]):
+				results.append((load_mesh_arrays(job["output"]), None))
+			elif os.path.exists(job["error"]):
+				with open(job["error"]) as f:
+					results.append((None, f.read().strip().splitlines()[-1]))
+			else:
+				results.append((None, worker_errors[i % num_workers]))
+				
+		return results
+		
+	finally:
+		shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -4,18 +4,51 @@ from os.path import join as j
 TOOL_NAME = "bge_tools_uv_scroll"
 SCRIPT_NAME = TOOL_NAME + ".py"
 MODULE_NAME = TOOL_NAME + ".main"
+MANAGER_NAME = TOOL_NAME + "_manager"
+MANAGER_MODULE_NAME = TOOL_NAME + ".manager"
 SCRIPT_PATH = j("bge-tools", "gen", SCRIPT_NAME)
 
 PROP_SPRITES_DEFAULT = (8, 8)
 PROP_SEQUENCE_DEFAULT = "0-63"
 PROP_SKIP_DEFAULT = 0
+PROP_FRAME_RATE_DEFAULT = 0.0
+PROP_CULL_DEFAULT = False
+PROP_CULL_DISTANCE_DEFAULT = 0.0
 PROP_LOOP_DEFAULT = -1
 PROP_PINGPONG_DEFAULT = False
 PROP_LINKED_DEFAULT = True
+PROP_USE_MANAGER_DEFAULT = False
+PROP_POOL_DEFAULT = False
+PROP_PHASES_DEFAULT = 1
 
 ERR_MSG_WRONG_OBJECT = "Selected object not suited for this application"
 ERR_MSG_WRONG_LAYER = "Selected object not in active layer"
 ERR_MSG_NO_OBJECT_SELECTED = "No object selected"
+ERR_MSG_ILLEGAL_VALUE = "Sequence contains illegal value: "
+ERR_MSG_OUT_OF_RANGE = "Sequence is out of range: "
+ERR_MSG_EMPTY_SEQUENCE = "Sequence is empty"
+
+def get_sequence_errors(sprites, string):
+	
+	# validate the sequence as the game engine script parses it, which skips the values returned here
+	
+	num_sprites = sprites[0] * sprites[1]
+	errors = []
+	num_values = 0
+	
+	for s in [s for s in string.replace(" ", "").split(",") if s != ""]:
+		ds = s.split("-") if "-" in s else s.split("*") if "*" in s else [s]
+		if not all(d.isdigit() for d in ds) or len(ds) > 2:
+			errors.append(ERR_MSG_ILLEGAL_VALUE + s)
+		elif not all(int(d) < num_sprites for d in ds):
+			errors.append(ERR_MSG_OUT_OF_RANGE + s)
+		else:
+			num_values += 1
+			
+	if not errors and not num_values:
+		errors.append(ERR_MSG_EMPTY_SEQUENCE)
+	return errors
+	
 
 class UVScroll(bpy.types.Operator):
 	
@@ -28,9 +61,15 @@ class UVScroll(bpy.types.Operator):
 	prop_sprites = bpy.props.IntVectorProperty(name="Sprites", description="Number of sprites horizontally (X) and vertically (Y)", min=1, subtype="XYZ", size=2)
 	prop_sequence = bpy.props.StringProperty(name="Sequence", description="Animation sequence. Example: \'0*2, 1-5, 7\' gives \'0, 0, 0, 1, 2, 3, 4, 5, 7\'")
 	prop_skip = bpy.props.IntProperty(name="Skip", description="Number of logic tics to skip", min=0)
+	prop_frame_rate = bpy.props.FloatProperty(name="Frame Rate", description="Frames per second of game time, played in time however often the logic runs; 0 advances a frame every logic tic that is not skipped", min=0.0)
 	prop_loop = bpy.props.IntProperty(name="Loop", description="Loop count; -1 infinite", min=-1)
 	prop_pingpong = bpy.props.BoolProperty(name="Pingpong", description="Reverse the sequence with every loop")
 	prop_linked = bpy.props.BoolProperty(name="Linked", description="Whether the mesh should be unique")
+	prop_pool = bpy.props.BoolProperty(name="Pool", description="Share one mesh between the objects of a group instead of giving every object a mesh of its own")
+	prop_phases = bpy.props.IntProperty(name="Phases", description="Number of mesh groups added objects are spread over, each playing at its own phase", min=1)
+	prop_cull = bpy.props.BoolProperty(name="Cull", description="Skip the uv update while the object is outside the view of the active camera, and catch up once it is back in view")
+	prop_cull_distance = bpy.props.FloatProperty(name="Cull Distance", description="Skip the uv update while the object is farther from the active camera; 0 for no limit", min=0.0, subtype="DISTANCE")
+	prop_use_manager = bpy.props.BoolProperty(name="Manager", description="Animate from one scene-level controller that scrolls objects sharing a mesh once per tic, instead of a controller per object")
 	
 	def invoke(self, context, event):
 		
@@ -41,10 +80,16 @@ class UVScroll(bpy.types.Operator):
 			self.prop_sprites = [int(s) for s in self.obj_props["sprites"].value.replace(" ", "").split(",")] if "sprites" in self.obj_props else PROP_SPRITES_DEFAULT
 			self.prop_sequence = self.obj_props["sequence"].value if "sequence" in self.obj_props else PROP_SEQUENCE_DEFAULT
 			sensors = context.object.game.sensors
-			self.prop_skip = sensors[TOOL_NAME].tick_skip if TOOL_NAME in sensors else PROP_SKIP_DEFAULT
+			self.prop_skip = sensors[TOOL_NAME].tick_skip if TOOL_NAME in sensors else self.obj_props["skip"].value if "skip" in self.obj_props else PROP_SKIP_DEFAULT
+			self.prop_frame_rate = self.obj_props["frame_rate"].value if "frame_rate" in self.obj_props else PROP_FRAME_RATE_DEFAULT
 			self.prop_loop = self.obj_props["loop"].value if "loop" in self.obj_props else PROP_LOOP_DEFAULT
 			self.prop_pingpong = self.obj_props["pingpong"].value if "pingpong" in self.obj_props else PROP_PINGPONG_DEFAULT
 			self.prop_linked = self.obj_props["linked"].value if "linked" in self.obj_props else PROP_LINKED_DEFAULT
+			self.prop_pool = self.obj_props["pool"].value if "pool" in self.obj_props else PROP_POOL_DEFAULT
+			self.prop_phases = self.obj_props["phases"].value if "phases" in self.obj_props else PROP_PHASES_DEFAULT
+			self.prop_cull = self.obj_props["cull"].value if "cull" in self.obj_props else PROP_CULL_DEFAULT
+			self.prop_cull_distance = self.obj_props["cull_distance"].value if "cull_distance" in self.obj_props else PROP_CULL_DISTANCE_DEFAULT
+			self.prop_use_manager = self.obj_props["manager"].value if "manager" in self.obj_props else PROP_USE_MANAGER_DEFAULT
 			self.duplicate = context.object.data in [o.data for o in bpy.data.objects if o != context.object]
 			self.error = None
 			
@@ -78,6 +123,12 @@ class UVScroll(bpy.types.Operator):
 		row = box.row(True)
 		row.prop(self, "prop_sequence")
 		
+		for e in get_sequence_errors(self.prop_sprites, self.prop_sequence):
+			box.label(e, icon="ERROR")
+			
+		row = box.row(True)
+		row.prop(self, "prop_frame_rate")
+		
 		row = box.row(True)
 		row.prop(self, "prop_skip")
 		row.prop(self, "prop_loop")
@@ -86,13 +137,29 @@ class UVScroll(bpy.types.Operator):
 		if self.duplicate:
 			row.prop(self, "prop_linked", toggle=True)
 			
+		row.prop(self, "prop_use_manager", toggle=True)
 		row.operator("bge_tools.uv_scroll_clear", text="", icon="X")
 		
+		row = box.row(True)
+		row.prop(self, "prop_pool", toggle=True)
+		sub = row.row(True)
+		sub.active = self.prop_pool
+		sub.prop(self, "prop_phases")
+		
+		row = box.row(True)
+		row.prop(self, "prop_cull", toggle=True)
+		row.prop(self, "prop_cull_distance")
+		
 	def execute(self, context):
 		
 		if self.error:
 			return {"CANCELLED"}
 			
+		errors = get_sequence_errors(self.prop_sprites, self.prop_sequence)
+		if errors:
+			self.report({"ERROR"}, "UV Scroll: " + ", ".join(errors))
+			return {"CANCELLED"}
+			
 		def add_properties():
 			if "sprites" not in self.obj_props:
 				bpy.ops.object.game_property_new(type="STRING", name="sprites")
@@ -104,6 +171,20 @@ class UVScroll(bpy.types.Operator):
 				bpy.ops.object.game_property_new(type="BOOL", name="pingpong")
 			if "linked" not in self.obj_props:
 				bpy.ops.object.game_property_new(type="BOOL", name="linked")
+			if "manager" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="BOOL", name="manager")
+			if "skip" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="INT", name="skip")
+			if "pool" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="BOOL", name="pool")
+			if "phases" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="INT", name="phases")
+			if "frame_rate" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="FLOAT", name="frame_rate")
+			if "cull" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="BOOL", name="cull")
+			if "cull_distance" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="FLOAT", name="cull_distance")
 				
 		def set_properties():
 			self.obj_props["sprites"].value = str(list(self.prop_sprites))[1:-1]
@@ -111,24 +192,53 @@ class UVScroll(bpy.types.Operator):
 			self.obj_props["loop"].value = self.prop_loop
 			self.obj_props["pingpong"].value = self.prop_pingpong
 			self.obj_props["linked"].value = self.prop_linked
+			self.obj_props["manager"].value = self.prop_use_manager
+			self.obj_props["skip"].value = self.prop_skip
+			self.obj_props["pool"].value = self.prop_pool
+			self.obj_props["phases"].value = self.prop_phases
+			self.obj_props["frame_rate"].value = self.prop_frame_rate
+			self.obj_props["cull"].value = self.prop_cull
+			self.obj_props["cull_distance"].value = self.prop_cull_distance
 			
-		def add_logic():
+		def add_logic(ob, module_name, tick_skip):
 			
-			if TOOL_NAME not in context.object.game.controllers:
-				bpy.ops.logic.controller_add(type="PYTHON", name=TOOL_NAME, object=context.object.name)
+			if TOOL_NAME not in ob.game.controllers:
+				bpy.ops.logic.controller_add(type="PYTHON", name=TOOL_NAME, object=ob.name)
 				
-			if TOOL_NAME not in context.object.game.sensors:
-				bpy.ops.logic.sensor_add(type="ALWAYS", name=TOOL_NAME, object=context.object.name)
+			if TOOL_NAME not in ob.game.sensors:
+				bpy.ops.logic.sensor_add(type="ALWAYS", name=TOOL_NAME, object=ob.name)
 				
-			sens = context.object.game.sensors[TOOL_NAME]
+			sens = ob.game.sensors[TOOL_NAME]
 			sens.use_pulse_true_level = True
-			sens.tick_skip = self.prop_skip
-			cont = context.object.game.controllers[TOOL_NAME]
+			sens.tick_skip = tick_skip
+			cont = ob.game.controllers[TOOL_NAME]
 			cont.mode = "MODULE"
-			cont.module = MODULE_NAME
+			cont.module = module_name
 			
 			cont.link(sensor=sens)
 			
+		def remove_logic(ob):
+			
+			if TOOL_NAME in ob.game.controllers:
+				bpy.ops.logic.controller_remove(controller=TOOL_NAME, object=ob.name)
+				
+			if TOOL_NAME in ob.game.sensors:
+				bpy.ops.logic.sensor_remove(sensor=TOOL_NAME, object=ob.name)
+				
+		def add_manager():
+			
+			# the objects are animated by the controller of an empty in the active layers, which skips tics per object
+			
+			remove_logic(context.object)
+			
+			manager = context.scene.objects.get(MANAGER_NAME)
+			if not manager:
+				manager = bpy.data.objects.new(MANAGER_NAME, None)
+				context.scene.objects.link(manager)
+				manager.layers = context.scene.layers
+				
+			add_logic(manager, MANAGER_MODULE_NAME, 0)
+			
 		def add_script_internal():
 			
 			if SCRIPT_NAME in bpy.data.texts:
@@ -163,11 +273,36 @@ class UVScroll(bpy.types.Operator):
 			bpy.ops.mesh.select_all(action="DESELECT")
 			bpy.ops.object.mode_set(mode="OBJECT")
 			
+		def report_pool():
+			
+			# count the objects of the mesh in the active layers that get a mesh of their own without the pool, the unlinked ones
+			# placed linked objects keep sharing their mesh and are not pooled, so they save nothing
+			# objects added at runtime are not counted, they save a mesh each once all phases are in use
+			
+			if not self.prop_pool:
+				return
+				
+			def is_unlinked(o):
+				if o == context.object:
+					return not self.prop_linked
+				props = o.game.properties
+				return "sprites" in props and "linked" in props and not props["linked"].value
+				
+			layers = context.scene.layers
+			objects = [o for o in context.scene.objects if o.data == context.object.data and any(a and b for a, b in zip(o.layers, layers))]
+			num_objects = len([o for o in objects if is_unlinked(o)])
+			num_meshes = min(num_objects, self.prop_phases)
+			self.report({"INFO"}, "UV Scroll pool: {} meshes instead of {}, {} saved, objects added at runtime not counted".format(num_meshes, num_objects, num_objects - num_meshes))
+			
 		add_properties()
 		set_properties()
-		add_logic()
+		if self.prop_use_manager:
+			add_manager()
+		else:
+			add_logic(context.object, MODULE_NAME, self.prop_skip)
 		add_script_internal()
 		set_uv_texture()
+		report_pool()
 		
 		return {"PASS_THROUGH"}
 		
@@ -183,8 +318,10 @@ class UVScrollClear(bpy.types.Operator):
 		for i in range(len(context.object.game.properties)):
 			bpy.ops.object.game_property_remove(i)
 			
-		bpy.ops.logic.controller_remove(controller=TOOL_NAME, object=context.object.name)
-		bpy.ops.logic.sensor_remove(sensor=TOOL_NAME, object=context.object.name)
+		if TOOL_NAME in context.object.game.controllers:
+			bpy.ops.logic.controller_remove(controller=TOOL_NAME, object=context.object.name)
+		if TOOL_NAME in context.object.game.sensors:
+			bpy.ops.logic.sensor_remove(sensor=TOOL_NAME, object=context.object.name)
 		
 		if SCRIPT_NAME in bpy.data.texts:
 			bpy.data.texts.remove(bpy.data.texts[SCRIPT_NAME], do_unlink=True)
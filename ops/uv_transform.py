@@ -14,6 +14,8 @@ PROP_ORIGIN_X_DEFAULT = 0.5
 PROP_ORIGIN_Y_DEFAULT = 0.5
 PROP_SKIP_DEFAULT = 0
 PROP_UNLINK_DEFAULT = True
+PROP_CULL_DEFAULT = False
+PROP_CULL_DISTANCE_DEFAULT = 0.0
 
 ERR_MSG_WRONG_OBJECT = "Selected object not suited for this application"
 ERR_MSG_WRONG_LAYER = "Selected object not in active layer"
@@ -33,6 +35,8 @@ class UVTransform(bpy.types.Operator):
 	prop_origin = bpy.props.FloatVectorProperty(name="", description="Normalized origin", min=0, max=1, default=(0.5, 0.5), subtype="XYZ", size=2)
 	prop_skip = bpy.props.IntProperty(name="Skip", description="Number of logic tics to skip", min=0)
 	prop_linked = bpy.props.BoolProperty(name="Linked", description="Give the object a unique mesh in game")
+	prop_cull = bpy.props.BoolProperty(name="Cull", description="Skip the uv update while the object is outside the view of the active camera, and catch up once it is back in view")
+	prop_cull_distance = bpy.props.FloatProperty(name="Cull Distance", description="Skip the uv update while the object is farther from the active camera; 0 for no limit", min=0.0, subtype="DISTANCE")
 	
 	def invoke(self, context, event):
 		
@@ -49,6 +53,8 @@ class UVTransform(bpy.types.Operator):
 			sensors = context.object.game.sensors
 			self.prop_skip = sensors[TOOL_NAME].tick_skip if TOOL_NAME in sensors else PROP_SKIP_DEFAULT
 			self.prop_linked = self.obj_props["linked"].value if "linked" in self.obj_props else PROP_UNLINK_DEFAULT
+			self.prop_cull = self.obj_props["cull"].value if "cull" in self.obj_props else PROP_CULL_DEFAULT
+			self.prop_cull_distance = self.obj_props["cull_distance"].value if "cull_distance" in self.obj_props else PROP_CULL_DISTANCE_DEFAULT
 			self.duplicate = context.object.data in [o.data for o in bpy.data.objects if o != context.object]
 			self.error = None
 			
@@ -99,6 +105,10 @@ class UVTransform(bpy.types.Operator):
 			
 		row.operator("bge_tools.uv_transform_clear", text="", icon="X")
 		
+		row = box.row(True)
+		row.prop(self, "prop_cull", toggle=True)
+		row.prop(self, "prop_cull_distance")
+		
 	def execute(self, context):
 		
 		if self.error:
@@ -119,6 +129,10 @@ class UVTransform(bpy.types.Operator):
 				bpy.ops.object.game_property_new(type="FLOAT", name="origin_y")
 			if "linked" not in self.obj_props:
 				bpy.ops.object.game_property_new(type="BOOL", name="linked")
+			if "cull" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="BOOL", name="cull")
+			if "cull_distance" not in self.obj_props:
+				bpy.ops.object.game_property_new(type="FLOAT", name="cull_distance")
 				
 		def set_properties():
 			self.obj_props["ref_obj_name"].value = self.prop_ref_obj_name
@@ -128,6 +142,8 @@ class UVTransform(bpy.types.Operator):
 			self.obj_props["origin_x"].value = self.prop_origin.x
 			self.obj_props["origin_y"].value = self.prop_origin.y
 			self.obj_props["linked"].value = self.prop_linked
+			self.obj_props["cull"].value = self.prop_cull
+			self.obj_props["cull_distance"].value = self.prop_cull_distance
 			
 		def add_logic():
 			
@@ -0,0 +1,69 @@
+import os, sys, types, importlib.util, pytest
+
+# the modules of ops are loaded from their files with stand-ins for the Blender modules,
+# so the parts that do not need Blender can be tested by running pytest outside of it
+
+OPS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ops")
+
+class Vector(tuple):
+	
+	def __new__(cls, values=(0.0, 0.0, 0.0)):
+		return tuple.__new__(cls, (float(f) for f in values))
+		
+	x = property(lambda self: self[0])
+	y = property(lambda self: self[1])
+	z = property(lambda self: self[2])
+	
+class Stub(types.ModuleType):
+	
+	# any attribute is another stub, calling one returns a stub as well
+	
+	def __getattr__(self, name):
+		if name.startswith("__"):
+			raise AttributeError(name)
+		return Stub(self.__name__ + "." + name)
+		
+	def __call__(self, *args, **kwargs):
+		return Stub(self.__name__ + "()")
+		
+class Types(types.ModuleType):
+	
+	# classes of bpy.types are derived from, so they are plain classes
+	
+	def __getattr__(self, name):
+		if name.startswith("__"):
+			raise AttributeError(name)
+		return type(name, (), {})
+		
+def add_stubs():
+	
+	# the add-on is imported as a package by pytest, so the stubs are added before any test module is
+	
+	bpy = Stub("bpy")
+	bpy.types = Types("bpy.types")
+	bpy.utils = Stub("bpy.utils")
+	bpy.utils.script_paths = lambda subdir: ["", ""]
+	bpy.path = Stub("bpy.path")
+	bpy.path.abspath = lambda path: path
+	
+	mathutils = Stub("mathutils")
+	mathutils.Vector = Vector
+	
+	for module in (bpy, Stub("bmesh"), mathutils):
+		sys.modules.setdefault(module.__name__, module)
+		
+add_stubs()
+
+def load_module(name):
+	spec = importlib.util.spec_from_file_location("bge_tools_" + name, os.path.join(OPS_PATH, name + ".py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+	
+@pytest.fixture(scope="session")
+def ut():
+	return load_module("utils")
+	
+@pytest.fixture(scope="session")
+def dc():
+	return load_module("decimate")
@@ -0,0 +1,128 @@
+import numpy, pytest
+
+def get_grid(n, seed=0):
+	
+	# returns the vertices and triangles of a bumpy n by n quad grid, its boundary vertices and the uv of every corner
+	
+	rng = numpy.random.RandomState(seed)
+	x, y = numpy.meshgrid(numpy.arange(n + 1, dtype=numpy.float64), numpy.arange(n + 1, dtype=numpy.float64))
+	z = rng.uniform(0.0, 0.2, x.shape)
+	co = numpy.stack((x.ravel(), y.ravel(), z.ravel()), axis=1)
+	
+	v = numpy.arange((n + 1) ** 2).reshape(n + 1, n + 1)
+	a, b, c, d = v[:-1, :-1].ravel(), v[:-1, 1:].ravel(), v[1:, 1:].ravel(), v[1:, :-1].ravel()
+	tris = numpy.concatenate((numpy.stack((a, b, c), axis=1), numpy.stack((a, c, d), axis=1)))
+	
+	boundary = (co[:, 0] == 0) | (co[:, 0] == n) | (co[:, 1] == 0) | (co[:, 1] == n)
+	return co, tris, boundary
+	
+def get_boundary_edges(tris):
+	edges = numpy.sort(tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+	edges, counts = numpy.unique(edges, axis=0, return_counts=True)
+	return {tuple(e) for e in edges[counts == 1].tolist()}
+	
+def get_grid_arrays(n):
+	
+	# returns the grid as the mesh arrays of utils.get_mesh_arrays, with the uv of every loop at its vertex
+	
+	co, tris, boundary = get_grid(n)
+	loop_vert = tris.ravel().astype(numpy.int32)
+	return {
+		"co": co.astype(numpy.float32),
+		"loop_vert": loop_vert,
+		"loop_start": numpy.arange(0, len(loop_vert), 3, dtype=numpy.int32),
+		"loop_total": numpy.full(len(tris), 3, dtype=numpy.int32),
+		"material_index": numpy.zeros(len(tris), dtype=numpy.int32),
+		"use_smooth": numpy.ones(len(tris), dtype=numpy.bool_),
+		"uv_names": numpy.array(["UVMap"], dtype=numpy.str_),
+		"uvs": co[loop_vert, None, :2].transpose(1, 0, 2).astype(numpy.float32),
+		"bounds": boundary
+	}
+	
+@pytest.mark.parametrize("ratio", [0.5, 0.25, 0.1])
+def test_target_ratio(dc, ratio):
+	co, tris, boundary = get_grid(24)
+	verts, tris_out, corners = dc.decimate(co, tris, ratio, boundary)
+	target = int(len(tris) * ratio)
+	
+	# a collapse removes the two faces of an inner edge, so the target is reached or passed by one face
+	
+	assert target - 1 <= len(tris_out) <= target
+	
+def test_locked_borders_are_exact(dc):
+	co, tris, boundary = get_grid(24)
+	verts, tris_out, corners = dc.decimate(co, tris, 0.2, boundary)
+	
+	assert set(boundary.nonzero()[0].tolist()) <= set(verts.tolist())
+	assert get_boundary_edges(verts[tris_out]) == get_boundary_edges(tris)
+	
+def test_no_flipped_faces(dc):
+	co, tris, boundary = get_grid(24)
+	verts, tris_out, corners = dc.decimate(co, tris, 0.1, boundary)
+	
+	# the grid is a height field facing up, so every remaining face has to face up
+	
+	v0, v1, v2 = (co[verts[tris_out[:, k]]] for k in range(3))
+	normals = numpy.cross(v1 - v0, v2 - v0)
+	assert (normals[:, 2] > 0).all()
+	
+def test_corners_map_to_their_vertices(dc):
+	co, tris, boundary = get_grid(16)
+	verts, tris_out, corners = dc.decimate(co, tris, 0.3, boundary)
+	
+	# every corner is taken from an original corner of the same vertex, so its attributes stay valid
+	
+	assert (tris.ravel()[corners] == verts[tris_out]).all()
+	
+def test_decimate_arrays_keeps_attributes(dc):
+	arrays = get_grid_arrays(16)
+	arrays_lod = dc.decimate_arrays(arrays, 0.3)
+	
+	num_tris = len(arrays["loop_start"])
+	assert len(arrays_lod["loop_start"]) <= int(num_tris * 0.3)
+	assert arrays_lod["bounds"].sum() == arrays["bounds"].sum()
+	
+	loop_co = arrays_lod["co"][arrays_lod["loop_vert"]]
+	assert numpy.array_equal(arrays_lod["uvs"][0], loop_co[:, :2])
+	
+def test_decimate_arrays_locks_uv_seams(dc):
+	arrays = get_grid_arrays(16)
+	
+	# shift the uvs of the left half, the vertices of the seam get two uvs and are locked
+	
+	left = arrays["co"][arrays["loop_vert"], 0] < 8
+	face_left = left.reshape(-1, 3).any(axis=1).repeat(3)
+	arrays["uvs"][0, face_left, 0] += 100.0
+	seam = (arrays["co"][:, 0] == 8).nonzero()[0]
+	
+	arrays_lod = dc.decimate_arrays(arrays, 0.2)
+	seam_co = {tuple(c) for c in arrays["co"][seam].tolist()}
+	assert seam_co <= {tuple(c) for c in arrays_lod["co"].tolist()}
+	
+def test_decimate_arrays_keeps_colors_and_edge_flags(dc):
+	arrays = get_grid_arrays(16)
+	
+	# the colors follow the vertices, the edges along x = 8 are sharp
+	
+	co = arrays["co"]
+	arrays["color_names"] = numpy.array(["Col"], dtype=numpy.str_)
+	arrays["colors"] = (co[arrays["loop_vert"], None] / 16.0).transpose(1, 0, 2)
+	arrays["vert_bevel_weight"] = co[:, 0] / 16.0
+	tris = arrays["loop_vert"].reshape(-1, 3)
+	edges = numpy.unique(numpy.sort(tris[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1), axis=0)
+	arrays["edge_verts"] = edges.astype(numpy.int32)
+	arrays["edge_sharp"] = (co[edges, 0] == 8).all(axis=1)
+	arrays["edge_seam"] = numpy.zeros(len(edges), dtype=numpy.bool_)
+	arrays["edge_crease"] = numpy.zeros(len(edges), dtype=numpy.float32)
+	arrays["edge_bevel_weight"] = numpy.zeros(len(edges), dtype=numpy.float32)
+	
+	arrays_lod = dc.decimate_arrays(arrays, 0.2)
+	co_lod = arrays_lod["co"]
+	
+	assert numpy.allclose(arrays_lod["colors"][0], co_lod[arrays_lod["loop_vert"]] / 16.0)
+	assert numpy.allclose(arrays_lod["vert_bevel_weight"], co_lod[:, 0] / 16.0)
+	
+	sharp = {tuple(sorted(map(tuple, co[e].tolist()))) for e in edges[arrays["edge_sharp"]]}
+	sharp_lod = {tuple(sorted(map(tuple, co_lod[e].tolist()))) for e in arrays_lod["edge_verts"][arrays_lod["edge_sharp"]]}
+	assert sharp_lod == sharp
+	assert arrays_lod["edge_sharp"].all()
@@ -0,0 +1,269 @@
+import sys, time, types, numpy, pytest
+
+# a grid of 4 by 2 cells of 2 by 3, centered on the origin, spans -4 to 4 and -3 to 3
+
+NUMBER = (4, 2)
+SIZE = (2.0, 3.0)
+
+@pytest.mark.parametrize("pnt, index", [
+	((-3.0, -1.5), (0, 0)),
+	((3.0, 1.5), (3, 1)),
+	((0.5, 0.1), (2, 1)),
+	((-0.5, -0.1), (1, 0)),
+])
+def test_grid_index_inside(ut, pnt, index):
+	assert ut.get_grid_index(pnt, NUMBER, SIZE) == index
+	
+@pytest.mark.parametrize("pnt, index", [
+	((0.0, 0.0), (1, 0)),
+	((-2.0, 1.0), (0, 1)),
+	((2.0, -1.0), (2, 0)),
+	((1.0, 0.0), (2, 0)),
+])
+def test_grid_index_shared_edge_belongs_to_lowest_index(ut, pnt, index):
+	assert ut.get_grid_index(pnt, NUMBER, SIZE) == index
+	
+@pytest.mark.parametrize("pnt, index", [
+	((-4.0, -3.0), (0, 0)),
+	((4.0, 3.0), (3, 1)),
+	((-4.0, 3.0), (0, 1)),
+	((4.0, -3.0), (3, 0)),
+])
+def test_grid_index_outer_boundary(ut, pnt, index):
+	assert ut.get_grid_index(pnt, NUMBER, SIZE) == index
+	
+@pytest.mark.parametrize("pnt", [
+	(-4.001, 0.0),
+	(4.001, 0.0),
+	(0.0, -3.001),
+	(0.0, 3.001),
+	(100.0, 100.0),
+])
+def test_grid_index_outside(ut, pnt):
+	assert ut.get_grid_index(pnt, NUMBER, SIZE) is None
+	
+def test_grid_index_factor(ut):
+	
+	# cells scaled by 0.5 around their centers only hold the middle half of every cell
+	
+	assert ut.get_grid_index((-3.0, -1.5), NUMBER, SIZE, 0.5) == (0, 0)
+	assert ut.get_grid_index((-3.5, -1.5), NUMBER, SIZE, 0.5) == (0, 0)
+	assert ut.get_grid_index((-3.6, -1.5), NUMBER, SIZE, 0.5) is None
+	assert ut.get_grid_index((-2.0, -1.5), NUMBER, SIZE, 0.5) is None
+	
+def test_grid_index_odd_number(ut):
+	
+	# with an odd number of cells the origin is the center of the middle cell
+	
+	assert ut.get_grid_index((0.0, 0.0), (3, 3), (1.0, 1.0)) == (1, 1)
+	assert ut.get_grid_index((0.5, 0.5), (3, 3), (1.0, 1.0)) == (1, 1)
+	assert ut.get_grid_index((0.51, 0.5), (3, 3), (1.0, 1.0)) == (2, 1)
+	
+def test_grid_index_matches_point_inside_rectangle(ut):
+	
+	# every cell found by the index contains the point, as tested on the cell rectangles
+	
+	for x in range(-40, 41):
+		for y in range(-30, 31):
+			pnt = ut.Vector((x * 0.1, y * 0.1))
+			index = ut.get_grid_index(pnt, NUMBER, SIZE)
+			assert index is not None
+			i, j = index
+			center = ut.Vector((SIZE[0] * (i + 0.5 - NUMBER[0] * 0.5), SIZE[1] * (j + 0.5 - NUMBER[1] * 0.5)))
+			assert ut.point_inside_rectangle(pnt, (center, ut.Vector(SIZE)))
+	
+def test_profiler_records_rise_of_peak_memory_per_stage(ut):
+	if ut.resource is None:
+		pytest.skip("peak memory is read with resource")
+	prof = ut.Profiler()
+	prof.measure("large", lambda: len(bytearray(256 * 1024 ** 2)))
+	prof.measure("small", lambda: len(bytearray(16 * 1024 ** 2)))
+	large, small = prof.stages
+	assert large["peak_memory_rise"] > 128
+	assert small["peak_memory_rise"] == 0
+	assert small["peak_memory"] == large["peak_memory"]
+	
+class FakeCollection:
+	
+	# mesh data collection holding one array per attribute, with the foreach access of Blender
+	
+	def __init__(self, sizes):
+		self.sizes = sizes
+		self.attrs = {attr: numpy.zeros((0, size)) for attr, size in sizes.items()}
+		
+	def __len__(self):
+		return len(next(iter(self.attrs.values())))
+		
+	def add(self, count):
+		for attr, size in self.sizes.items():
+			self.attrs[attr] = numpy.vstack((self.attrs[attr], numpy.zeros((count, size))))
+			
+	def foreach_get(self, attr, seq):
+		seq[:] = self.attrs[attr].ravel()
+		
+	def foreach_set(self, attr, seq):
+		self.attrs[attr][:] = numpy.reshape(seq, self.attrs[attr].shape)
+		
+class FakeLayers(list):
+	
+	def __init__(self, loops, size, attr):
+		self.loops = loops
+		self.size = size
+		self.attr = attr
+		
+	def __getitem__(self, key):
+		return next(layer for layer in self if layer.name == key) if isinstance(key, str) else list.__getitem__(self, key)
+		
+	def new(self, name):
+		layer = type("Layer", (), {})()
+		layer.name = name
+		layer.data = FakeCollection({self.attr: self.size})
+		layer.data.add(len(self.loops))
+		self.append(layer)
+		return layer
+		
+class FakeMesh:
+	
+	# calculating edges keeps the edges there are, with their flags, and adds those of the polygons, as Blender does
+	
+	def __init__(self):
+		self.vertices = FakeCollection({"co": 3, "bevel_weight": 1})
+		self.edges = FakeCollection({"vertices": 2, "use_edge_sharp": 1, "use_seam": 1, "crease": 1, "bevel_weight": 1})
+		self.loops = FakeCollection({"vertex_index": 1})
+		self.polygons = FakeCollection({"loop_start": 1, "loop_total": 1, "material_index": 1, "use_smooth": 1})
+		self.uv_layers = FakeLayers(self.loops, 2, "uv")
+		self.uv_textures = self.uv_layers
+		self.vertex_colors = FakeLayers(self.loops, 3, "color")
+		self.use_auto_smooth = False
+		self.auto_smooth_angle = 0.5
+		
+	def update(self, calc_edges=False):
+		edges = {tuple(sorted(e)) for e in self.edges.attrs["vertices"].astype(int).tolist()}
+		loop_vert = self.loops.attrs["vertex_index"].ravel().astype(int)
+		loop_start = self.polygons.attrs["loop_start"].ravel().astype(int)
+		loop_total = self.polygons.attrs["loop_total"].ravel().astype(int)
+		for start, total in zip(loop_start, loop_total):
+			verts = loop_vert[start:start + total].tolist()
+			for a, b in zip(verts, verts[1:] + verts[:1]):
+				if tuple(sorted((a, b))) not in edges:
+					edges.add(tuple(sorted((a, b))))
+					self.edges.add(1)
+					self.edges.attrs["vertices"][-1] = (a, b)
+					
+def test_mesh_arrays_keep_edge_flags_and_vertex_colors(ut):
+	me = FakeMesh()
+	co = numpy.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (2, 0, 0), (2, 1, 0)], dtype=numpy.float32)
+	arrays = {
+		"co": co,
+		"vert_bevel_weight": numpy.array([0, 0, 0.5, 0, 0, 0], dtype=numpy.float32),
+		"edge_verts": numpy.array([(0, 1), (1, 2), (2, 3), (3, 0), (1, 4), (4, 5), (5, 2)], dtype=numpy.int32),
+		"edge_sharp": numpy.array([0, 1, 0, 0, 0, 0, 0], dtype=numpy.bool_),
+		"edge_seam": numpy.array([0, 0, 0, 0, 0, 1, 0], dtype=numpy.bool_),
+		"edge_crease": numpy.array([0, 0, 0, 0.25, 0, 0, 0], dtype=numpy.float32),
+		"edge_bevel_weight": numpy.zeros(7, dtype=numpy.float32),
+		"loop_vert": numpy.array([0, 1, 2, 3, 1, 4, 5, 2], dtype=numpy.int32),
+		"loop_start": numpy.array([0, 4], dtype=numpy.int32),
+		"loop_total": numpy.array([4, 4], dtype=numpy.int32),
+		"material_index": numpy.array([0, 1], dtype=numpy.int32),
+		"use_smooth": numpy.array([1, 0], dtype=numpy.bool_),
+		"uv_names": numpy.array(["UVMap"], dtype=numpy.str_),
+		"uvs": co[None, [0, 1, 2, 3, 1, 4, 5, 2], :2],
+		"color_names": numpy.array(["Col"], dtype=numpy.str_),
+		"colors": numpy.linspace(0.0, 1.0, 24, dtype=numpy.float32).reshape(1, 8, 3),
+		"bounds": numpy.zeros(6, dtype=numpy.bool_)
+	}
+	ut.set_mesh_arrays(me, arrays)
+	result = ut.get_mesh_arrays(me)
+	
+	def get_flags(arrays):
+		return {tuple(sorted(e)): (sharp, seam, crease) for e, sharp, seam, crease in zip(arrays["edge_verts"].tolist(), arrays["edge_sharp"].tolist(), arrays["edge_seam"].tolist(), arrays["edge_crease"].tolist())}
+		
+	assert get_flags(result) == get_flags(arrays)
+	assert numpy.array_equal(result["vert_bevel_weight"], arrays["vert_bevel_weight"])
+	assert result["color_names"].tolist() == ["Col"]
+	assert numpy.allclose(result["colors"], arrays["colors"])
+	assert numpy.allclose(result["uvs"], arrays["uvs"])
+	
+FAKE_WORKER = """import sys, json, time, shutil
+jobs_path = sys.argv[sys.argv.index("--") + 1]
+for job in json.load(open(jobs_path)):
+	if job["ratio"] < 0:
+		time.sleep(60)
+	elif job["ratio"] == 0:
+		open(job["error"], "w").write("Traceback\\nValueError: empty ratio\\n")
+	else:
+		shutil.copy(job["input"], job["output"])
+"""
+
+@pytest.fixture
+def fake_blender(ut, tmp_path, monkeypatch):
+	
+	# a Blender binary that runs the worker script with Python, and a worker copying its inputs
+	
+	worker_path = tmp_path / "worker.py"
+	worker_path.write_text(FAKE_WORKER)
+	binary_path = tmp_path / "blender"
+	binary_path.write_text("#!/bin/sh\nexec " + sys.executable + " \"$4\" \"$5\" \"$6\"\n")
+	binary_path.chmod(0o755)
+	monkeypatch.setattr(ut, "bpy", types.SimpleNamespace(app=types.SimpleNamespace(binary_path=str(binary_path))))
+	monkeypatch.setattr(ut, "LOD_WORKER_PATH", str(worker_path))
+	
+def test_decimate_in_workers_reports_errors_per_job(ut, fake_blender):
+	arrays = {"co": numpy.zeros((3, 3), dtype=numpy.float32), "bounds": numpy.zeros(3, dtype=numpy.bool_)}
+	results = ut.decimate_in_workers([(arrays, 0.5), (arrays, 0.0)], 1)
+	
+	assert numpy.array_equal(results[0][0]["co"], arrays["co"])
+	assert results[0][1] is None
+	assert results[1] == (None, "ValueError: empty ratio")
+	
+def test_decimate_in_workers_kills_workers_past_timeout(ut, fake_blender):
+	arrays = {"co": numpy.zeros((3, 3), dtype=numpy.float32), "bounds": numpy.zeros(3, dtype=numpy.bool_)}
+	start = time.perf_counter()
+	results = ut.decimate_in_workers([(arrays, 0.5), (arrays, -1.0)], 2, job_timeout=1)
+	
+	assert time.perf_counter() - start < 30
+	assert results[0][0] is not None
+	assert results[1][0] is None and "timed out" in results[1][1]
+	
+def test_polygons_arrays_keep_the_layers_of_the_selected_polygons(ut):
+	me = FakeMesh()
+	co = numpy.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (2, 0, 0), (2, 1, 0)], dtype=numpy.float32)
+	arrays = {
+		"co": co,
+		"vert_bevel_weight": numpy.array([0, 0, 0.5, 0, 0, 0.25], dtype=numpy.float32),
+		"edge_verts": numpy.array([(0, 1), (1, 2), (2, 3), (3, 0), (1, 4), (4, 5), (5, 2), (1, 5)], dtype=numpy.int32),
+		"edge_sharp": numpy.array([0, 1, 0, 0, 0, 0, 1, 0], dtype=numpy.bool_),
+		"edge_seam": numpy.array([0, 0, 0, 0, 0, 1, 0, 0], dtype=numpy.bool_),
+		"edge_crease": numpy.array([0, 0, 0, 0.25, 0, 0, 0, 0], dtype=numpy.float32),
+		"edge_bevel_weight": numpy.zeros(8, dtype=numpy.float32),
+		"loop_vert": numpy.array([0, 1, 2, 3, 1, 4, 5, 2], dtype=numpy.int32),
+		"loop_start": numpy.array([0, 4], dtype=numpy.int32),
+		"loop_total": numpy.array([4, 4], dtype=numpy.int32),
+		"material_index": numpy.array([0, 1], dtype=numpy.int32),
+		"use_smooth": numpy.array([1, 0], dtype=numpy.bool_),
+		"uv_names": numpy.array(["UVMap"], dtype=numpy.str_),
+		"uvs": co[None, [0, 1, 2, 3, 1, 4, 5, 2], :2],
+		"color_names": numpy.array(["Col"], dtype=numpy.str_),
+		"colors": numpy.linspace(0.0, 1.0, 24, dtype=numpy.float32).reshape(1, 8, 3),
+		"bounds": numpy.zeros(6, dtype=numpy.bool_),
+		"auto_smooth": numpy.array([1, 0.5], dtype=numpy.float32)
+	}
+	result = ut.get_polygons_arrays(arrays, numpy.array([False, True]))
+	
+	assert result["co"].tolist() == co[[1, 2, 4, 5]].tolist()
+	assert result["vert_bevel_weight"].tolist() == [0, 0.5, 0, 0.25]
+	assert result["co"][result["loop_vert"]].tolist() == co[[1, 4, 5, 2]].tolist()
+	assert result["loop_start"].tolist() == [0] and result["loop_total"].tolist() == [4]
+	assert result["material_index"].tolist() == [1]
+	assert numpy.array_equal(result["uvs"], arrays["uvs"][:, 4:])
+	assert numpy.array_equal(result["colors"], arrays["colors"][:, 4:])
+	
+	# the edge across the selected polygon is not one of its edges and is left out
+	
+	edges = {tuple(sorted(map(tuple, result["co"][e].tolist()))): (sharp, seam) for e, sharp, seam in zip(result["edge_verts"], result["edge_sharp"].tolist(), result["edge_seam"].tolist())}
+	assert len(edges) == 4
+	assert edges[((1, 0, 0), (1, 1, 0))] == (True, False)
+	assert edges[((2, 0, 0), (2, 1, 0))] == (False, True)
+	
+	ut.set_mesh_arrays(me, result)
+	assert numpy.allclose(ut.get_mesh_arrays(me)["colors"], result["colors"])